@@ -1,18 +1,50 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, abort, make_response, Response
 import pandas as pd
 from flask_cors import CORS
 import traceback
 import numpy as np
 from datetime import datetime, timedelta
 import calendar
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 import re
+import threading
+import os
+import json
+import csv
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.feather as feather
+import pyarrow.ipc as ipc
+import io
+import copy
+import functools
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
 app = Flask(__name__)
-CORS(app)  # Enable CORS for communication with Streamlit
+CORS(app, expose_headers=['X-Total', 'X-Offset', 'X-Limit', 'X-Next-Offset'])  # Enable CORS for communication with Streamlit
 
-# Global DataFrame to hold uploaded data
-df_global = None
+# Directory holding one persisted Arrow IPC file per dataset
+DATA_DIR = os.environ.get('EXPENSE_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+
+# Total memory the resident datasets may use before least-recently-used ones are evicted
+MEMORY_BUDGET_BYTES = int(float(os.environ.get('EXPENSE_MEMORY_BUDGET_MB', 512)) * 1024 * 1024)
+
+# Recategorizations appended to a dataset's edit log before the dataset file is rewritten with them
+EDIT_LOG_MAX_ENTRIES = int(os.environ.get('EXPENSE_EDIT_LOG_MAX_ENTRIES', 500))
+
+# Dataset used by clients that don't send a dataset id
+DEFAULT_DATASET_ID = 'default'
+DATASET_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+# Resident datasets in LRU order: dataset id -> {'df', 'version', 'edits', 'nbytes', 'id_index', 'fingerprints', 'aggregates'}
+_datasets = OrderedDict()
+_datasets_lock = threading.Lock()
+
+# Per-dataset write locks: uploads and edits of one dataset run one at a time
+_dataset_write_locks = {}
 
 # Predefined categories
 PREDEFINED_CATEGORIES = [
@@ -21,263 +53,1224 @@ PREDEFINED_CATEGORIES = [
     'Investment', 'Travel', 'Personal Care', 'Home & Garden', 'Other'
 ]
 
-def categorize_transaction(description):
-    """Categorize transaction based on description"""
-    description = str(description).upper()
-    
-    # Groceries
-    if any(keyword in description for keyword in [
+# Category keywords in priority order: the first category with a matching keyword wins
+CATEGORY_KEYWORDS = {
+    'Groceries': [
         'GROCERY', 'SUPERMARKET', 'FOOD', 'VEGETABLE', 'FRUIT', 'MILK',
         'BREAD', 'RICE', 'DAL', 'OIL', 'SPICE', 'KIRANA', 'GENERAL STORE',
         'BIG BAZAAR', 'RELIANCE FRESH', 'DMART', 'GROFERS', 'BIGBASKET'
-    ]):
-        return 'Groceries'
-    
-    # Utilities
-    elif any(keyword in description for keyword in [
+    ],
+    'Utilities': [
         'ELECTRICITY', 'POWER', 'GAS', 'WATER', 'INTERNET', 'PHONE',
         'MOBILE', 'BROADBAND', 'WIFI', 'UTILITY', 'BILL', 'PAYMENT',
         'BSNL', 'AIRTEL', 'JIO', 'VODAFONE', 'IDEA', 'MTNL'
-    ]):
-        return 'Utilities'
-    
-    # Rent
-    elif any(keyword in description for keyword in [
+    ],
+    'Rent': [
         'RENT', 'HOUSE RENT', 'ACCOMMODATION', 'LEASE', 'RENTAL'
-    ]):
-        return 'Rent'
-    
-    # Entertainment
-    elif any(keyword in description for keyword in [
+    ],
+    'Entertainment': [
         'MOVIE', 'CINEMA', 'NETFLIX', 'AMAZON PRIME', 'HOTSTAR', 'ENTERTAINMENT',
         'GAME', 'GAMING', 'PLAYSTATION', 'XBOX', 'NINTENDO', 'BOOK', 'MAGAZINE',
         'NEWSPAPER', 'MUSIC', 'SPOTIFY', 'YOUTUBE', 'STREAMING'
-    ]):
-        return 'Entertainment'
-    
-    # Transportation
-    elif any(keyword in description for keyword in [
+    ],
+    'Transportation': [
         'PETROL', 'DIESEL', 'FUEL', 'GAS', 'UBER', 'OLA', 'TAXI', 'BUS',
         'TRAIN', 'METRO', 'PARKING', 'TOLL', 'TRANSPORT', 'CAB', 'AUTO',
         'PETROL PUMP', 'HP', 'SHELL', 'BP', 'INDIAN OIL'
-    ]):
-        return 'Transportation'
-    
-    # Dining
-    elif any(keyword in description for keyword in [
+    ],
+    'Dining': [
         'RESTAURANT', 'CAFE', 'FOOD', 'MEAL', 'LUNCH', 'DINNER', 'BREAKFAST',
         'SWIGGY', 'ZOMATO', 'FOODPANDA', 'DOMINOS', 'PIZZA HUT', 'KFC',
         'MCDONALDS', 'SUBWAY', 'CAFETERIA', 'CANTEEN', 'HOTEL', 'BAR', 'PUB'
-    ]):
-        return 'Dining'
-    
-    # Shopping
-    elif any(keyword in description for keyword in [
+    ],
+    'Shopping': [
         'AMAZON', 'FLIPKART', 'MYNTRA', 'SHOPPING', 'PURCHASE', 'MALL',
         'SHOP', 'RETAIL', 'CLOTHING', 'FASHION', 'SHOES', 'ELECTRONICS',
         'APPLIANCES', 'FURNITURE', 'DECOR', 'LIFESTYLE', 'JABONG',
         'SNAPDEAL', 'PAYTM MALL', 'TATA CLIQ', 'NYKAA', 'LENSKART'
-    ]):
-        return 'Shopping'
-    
-    # Healthcare
-    elif any(keyword in description for keyword in [
+    ],
+    'Healthcare': [
         'HOSPITAL', 'DOCTOR', 'MEDICAL', 'PHARMACY', 'MEDICINE', 'HEALTH',
         'CLINIC', 'DENTAL', 'SURGERY', 'AMBULANCE', 'APOLLO', 'FORTIS',
         'MAX HOSPITAL', 'MEDPLUS', 'NETMEDS', 'PRACTO', 'HEALTHKART'
-    ]):
-        return 'Healthcare'
-    
-    # Education
-    elif any(keyword in description for keyword in [
+    ],
+    'Education': [
         'SCHOOL', 'COLLEGE', 'UNIVERSITY', 'EDUCATION', 'TUITION', 'FEES',
         'COURSE', 'TRAINING', 'BOOKS', 'LIBRARY', 'EXAM', 'BYJU',
         'UNACADEMY', 'VEDANTU', 'STUDENT', 'ACADEMIC'
-    ]):
-        return 'Education'
-    
-    # Insurance
-    elif any(keyword in description for keyword in [
+    ],
+    'Insurance': [
         'INSURANCE', 'POLICY', 'PREMIUM', 'LIC', 'HDFC LIFE', 'ICICI PRU',
         'SBI LIFE', 'BAJAJ ALLIANZ', 'TATA AIG', 'RELIANCE GENERAL',
         'HEALTH INSURANCE', 'MOTOR INSURANCE', 'TERM INSURANCE'
-    ]):
-        return 'Insurance'
-    
-    # Investment
-    elif any(keyword in description for keyword in [
+    ],
+    'Investment': [
         'MUTUAL FUND', 'SIP', 'INVESTMENT', 'TRADING', 'ZERODHA', 'GROWW',
         'ANGEL BROKING', 'UPSTOX', 'PAYTM MONEY', 'KUVERA', 'STOCK',
         'EQUITY', 'BOND', 'FD', 'RD', 'PPF', 'ELSS', 'NSE', 'BSE'
-    ]):
-        return 'Investment'
-    
-    # Travel
-    elif any(keyword in description for keyword in [
+    ],
+    'Travel': [
         'IRCTC', 'MAKEMYTRIP', 'GOIBIBO', 'CLEARTRIP', 'YATRA', 'TRAVEL',
         'BOOKING', 'HOTEL', 'FLIGHT', 'TRAIN', 'BUS', 'TICKET', 'VACATION',
         'HOLIDAY', 'TOURISM', 'AIRBNB', 'OYO', 'TREEBO', 'REDBUS'
-    ]):
-        return 'Travel'
-    
-    # Personal Care
-    elif any(keyword in description for keyword in [
+    ],
+    'Personal Care': [
         'SALON', 'PARLOUR', 'BEAUTY', 'COSMETICS', 'SKINCARE', 'HAIRCUT',
         'MASSAGE', 'SPA', 'WELLNESS', 'FITNESS', 'GYM', 'YOGA',
         'PERSONAL CARE', 'GROOMING', 'URBAN COMPANY', 'LAKME'
-    ]):
-        return 'Personal Care'
-    
-    # Home & Garden
-    elif any(keyword in description for keyword in [
+    ],
+    'Home & Garden': [
         'HOME DEPOT', 'GARDEN', 'PLANTS', 'NURSERY', 'HARDWARE', 'TOOLS',
         'REPAIR', 'MAINTENANCE', 'PLUMBER', 'ELECTRICIAN', 'CARPENTER',
         'PAINT', 'TILES', 'CEMENT', 'CONSTRUCTION', 'RENOVATION'
-    ]):
-        return 'Home & Garden'
+    ],
+}
+
+# One compiled alternation per category, built once at import time
+CATEGORY_PATTERNS = [
+    (category, re.compile('|'.join(re.escape(keyword) for keyword in keywords)))
+    for category, keywords in CATEGORY_KEYWORDS.items()
+]
+
+def categorize_transaction(description):
+    """Categorize transaction based on description"""
+    description = str(description).upper()
+    for category, pattern in CATEGORY_PATTERNS:
+        if pattern.search(description):
+            return category
+    return 'Other'
+
+CATEGORY_LABELS = np.array([category for category, _ in CATEGORY_PATTERNS] + ['Other'], dtype=object)
+
+def categorize_descriptions(descriptions):
+    """Categorize a whole Description column in one batch.
+
+    Each category pattern is one RE2 scan of the whole column in pyarrow,
+    with no Python call per row. Scans run from the last category to the
+    first, so every row ends up with its minimum matching category index,
+    the same first-category-wins result as categorize_transaction.
+    """
+    upper = pa.array(descriptions.astype(str).str.upper().to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+    best = np.full(len(upper), len(CATEGORY_PATTERNS))
+    for index in range(len(CATEGORY_PATTERNS) - 1, -1, -1):
+        hits = pc.match_substring_regex(upper, CATEGORY_PATTERNS[index][1].pattern)
+        best[pc.fill_null(hits, False).to_numpy(zero_copy_only=False)] = index
+    return pd.Series(CATEGORY_LABELS[best], index=descriptions.index)
+
+def compile_keywords(keywords):
+    """One case-insensitive alternation for a list of custom keywords, or None if empty"""
+    keywords = [k.strip() for k in keywords if isinstance(k, str) and k.strip()]
+    if not keywords:
+        return None
+    return re.compile('|'.join(re.escape(k) for k in keywords), re.IGNORECASE)
+
+def match_keyword_rules(descriptions, rules):
+    """Custom category per row from keyword rules, None where no rule matches.
     
-    else:
-        return 'Other'
+    Later rules win, as with repeated add_custom_category calls, so rules are
+    scanned newest first and each one only looks at rows still unclaimed.
+    Categorical columns are matched once per distinct description.
+    """
+    if isinstance(descriptions.dtype, pd.CategoricalDtype):
+        labels = match_keyword_rules(pd.Series(descriptions.cat.categories.astype(str)), rules)
+        codes = descriptions.cat.codes.to_numpy()
+        return np.where(codes >= 0, labels[codes], None)
+    values = descriptions.astype(str).to_numpy(dtype=object)
+    labels = np.full(len(values), None, dtype=object)
+    pending = np.arange(len(values))
+    for rule in reversed(rules):
+        pattern = compile_keywords(rule['keywords'])
+        if pattern is None:
+            continue
+        if len(pending) == 0:
+            break
+        hits = np.fromiter((pattern.search(text) is not None for text in values[pending]),
+                           dtype=bool, count=len(pending))
+        labels[pending[hits]] = rule['category']
+        pending = pending[~hits]
+    return labels
 
-@app.route("/api/upload_csv", methods=["POST"])
-def upload_csv():
-    global df_global
+def apply_keyword_rules(df, rules):
+    """Set Category and custom_name from keyword rules in place; returns the matched row positions"""
+    labels = match_keyword_rules(df['Description'], rules)
+    rows = np.flatnonzero(pd.notna(labels))
+    if len(rows):
+        set_rows(df, rows, 'Category', labels[rows])
+        set_rows(df, rows, 'custom_name', labels[rows])
+    return rows
+
+# Bounded LRU cache of normalized narration -> Category shared by all uploads
+CATEGORY_CACHE_SIZE = 100000
+_category_cache = OrderedDict()
+_category_cache_lock = threading.Lock()
+category_cache_stats = {'hits': 0, 'misses': 0}
+
+def normalize_narration(descriptions):
+    """Cache key for a Description column (matching is case-insensitive)"""
+    return descriptions.astype(str).str.upper().str.strip()
+
+def categorize_cached(descriptions):
+    """Categorize a Description column, only matching narrations not seen before"""
+    codes, uniques = pd.factorize(normalize_narration(descriptions).to_numpy())
+    labels = np.empty(len(uniques), dtype=object)
+    missing = []
+    with _category_cache_lock:
+        for i, key in enumerate(uniques):
+            category = _category_cache.get(key)
+            if category is None:
+                missing.append(i)
+            else:
+                _category_cache.move_to_end(key)
+                labels[i] = category
+        category_cache_stats['hits'] += len(uniques) - len(missing)
+        category_cache_stats['misses'] += len(missing)
+    
+    if missing:
+        labels[missing] = categorize_descriptions(pd.Series(uniques[missing])).to_numpy()
+        with _category_cache_lock:
+            for key, category in zip(uniques[missing], labels[missing]):
+                _category_cache[key] = category
+            while len(_category_cache) > CATEGORY_CACHE_SIZE:
+                _category_cache.popitem(last=False)
     
+    return pd.Series(labels[codes], index=descriptions.index)
+
+def resolve_dataset_id():
+    """Dataset id of the caller, from the X-Dataset-Id header or a dataset_id parameter.
+    
+    Callers that send no id share DEFAULT_DATASET_ID. Aborts with 400 on ids
+    that are not safe to use as file names.
+    """
+    dataset_id = (request.headers.get('X-Dataset-Id')
+                  or request.args.get('dataset_id')
+                  or request.form.get('dataset_id'))
+    if not dataset_id:
+        return DEFAULT_DATASET_ID
+    if not DATASET_ID_PATTERN.match(dataset_id):
+        abort(make_response(jsonify({"error": f"Invalid dataset ID: {dataset_id}"}), 400))
+    return dataset_id
+
+def dataset_path(dataset_id):
+    return os.path.join(DATA_DIR, f"{dataset_id}.arrow")
+
+def edits_path(dataset_id):
+    return os.path.join(DATA_DIR, f"{dataset_id}.edits.jsonl")
+
+def dataset_version(dataset_id):
+    """(mtime of the dataset file, size of its edit log), which changes whenever
+    any process writes either. Raises FileNotFoundError if there is no dataset."""
+    mtime = os.stat(dataset_path(dataset_id)).st_mtime_ns
     try:
-        if 'file' not in request.files:
-            return jsonify({"error": "No file provided"}), 400
-        
-        file = request.files['file']
-        if file.filename == '':
-            return jsonify({"error": "No file selected"}), 400
-        
-        if not file.filename.endswith('.csv'):
-            return jsonify({"error": "Please upload a CSV file"}), 400
+        return mtime, os.stat(edits_path(dataset_id)).st_size
+    except FileNotFoundError:
+        return mtime, 0
+
+def dataset_lock(dataset_id):
+    """The lock held while a dataset is loaded, changed (data and aggregates) and saved"""
+    with _datasets_lock:
+        return _dataset_write_locks.setdefault(dataset_id, threading.Lock())
+
+def writes_dataset(view):
+    """Run a write endpoint under the caller's dataset_lock, so concurrent
+    requests cannot interleave their edits or lose each other's writes"""
+    @functools.wraps(view)
+    def locked(*args, **kwargs):
+        with dataset_lock(resolve_dataset_id()):
+            return view(*args, **kwargs)
+    return locked
+
+def replace_file(path, write):
+    """Write a file through a uniquely named temp file next to it, then swap it in atomically"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def _to_arrow_table(df):
+    """Convert to Arrow, stringifying object columns that mix value types"""
+    df = df.reset_index(drop=True)
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        df = df.copy()
+        for col in df.columns[df.dtypes == object]:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+# Amount columns held as integer paise from ingest on (exact sums, 8 bytes a row)
+PAISE_COLUMNS = ['Amount', 'Closing Balance']
+
+# Arrow schema metadata key recording the unit of the stored amount columns
+AMOUNT_UNIT_KEY = b'amount_unit'
 
-        # Read CSV file
-        df = pd.read_csv(file)
+# Text columns become categoricals when at most this share of their values is distinct
+CATEGORICAL_MAX_UNIQUE_RATIO = 0.5
+
+def to_paise(values):
+    """A rupee amount column (numbers, or text with thousands separators) as nullable integer paise"""
+    if not pd.api.types.is_numeric_dtype(values):
+        values = pd.to_numeric(values.astype(str).str.replace(',', ''), errors='coerce')
+    return (values.astype('float64') * 100).round().astype('Int64')
+
+def paise_array(values):
+    """A paise column as a plain int64 array, with missing amounts as 0"""
+    if values.dtype == np.int64:
+        return values.to_numpy()
+    return values.to_numpy(dtype='int64', na_value=0)
+
+def compact_transactions(df, drop_redundant=True):
+    """Convert a cleaned dataset to the compact in-memory layout, in place.
+    
+    Amounts (paise since clean_transactions) become non-nullable where they
+    can, Category/custom_name and other repetitive text columns become
+    categoricals, and columns derivable from others are dropped: Narration
+    (copied into Description), Withdrawal/Deposit Amt. (the two sides of
+    Amount) and blank "Unnamed" columns. With drop_redundant=False those
+    columns are kept, for chunks of a file where only the whole file shows
+    whether they are redundant. Frames already compacted are returned as they
+    are; rupee views from expand_transactions are converted back to paise.
+    Returns df.
+    """
+    if df.attrs.get('compact'):
+        return df
+    if df.attrs.pop('rupees', False):
+        for col in PAISE_COLUMNS:
+            if col in df.columns:
+                df[col] = to_paise(df[col])
+    
+    redundant = []
+    if drop_redundant:
+        redundant = [col for col in df.columns if str(col).startswith('Unnamed:') and df[col].isna().all()]
+        if 'Narration' in df.columns and 'Description' in df.columns:
+            narration = df['Narration'].astype(object).fillna('No description').astype(str).to_numpy()
+            if (narration == df['Description'].astype(str).to_numpy()).all():
+                redundant.append('Narration')
+        if 'Withdrawal Amt.' in df.columns and 'Deposit Amt.' in df.columns:
+            withdrawal, deposit = to_paise(df['Withdrawal Amt.']), to_paise(df['Deposit Amt.'])
+            if not ((withdrawal > 0) & (deposit > 0)).any() and (deposit - withdrawal).equals(df['Amount'].astype('Int64')):
+                redundant += ['Withdrawal Amt.', 'Deposit Amt.']
+    df.drop(columns=redundant, inplace=True)
+    
+    for col in PAISE_COLUMNS:
+        if col in df.columns and df[col].dtype != np.int64 and not df[col].hasnans:
+            df[col] = df[col].astype('int64')
+    
+    for col in df.columns:
+        if not pd.api.types.is_string_dtype(df[col].dtype):
+            continue
+        if col in ('Category', 'custom_name') or (
+                pd.api.types.infer_dtype(df[col], skipna=True) == 'string'
+                and df[col].nunique(dropna=False) <= CATEGORICAL_MAX_UNIQUE_RATIO * len(df)):
+            df[col] = df[col].astype('category')
+    
+    if 'id' in df.columns and len(df) and df['id'].max() < 2 ** 31:
+        df['id'] = df['id'].astype('int32')
+    
+    df.attrs['compact'] = True
+    return df
+
+def concat_compact(frames):
+    """Concatenate compacted frames with the same columns (chunks of one file).
+    
+    Categorical columns are first given the union of the frames' categories,
+    so the result keeps them as codes instead of materializing every string.
+    The result is not flagged compact: it is compacted again, redundant
+    columns included, when it is saved.
+    """
+    for col in frames[0].columns:
+        if all(isinstance(frame[col].dtype, pd.CategoricalDtype) for frame in frames):
+            categories = frames[0][col].cat.categories
+            for frame in frames[1:]:
+                categories = categories.union(frame[col].cat.categories)
+            for frame in frames:
+                frame[col] = frame[col].cat.set_categories(categories)
+    df = pd.concat(frames, ignore_index=True)
+    df.attrs.pop('compact', None)
+    return df
+
+def expand_transactions(df):
+    """The dataset with float rupee amounts and plain strings, flagged as a rupee view"""
+    expanded = df.copy()
+    expanded.attrs.pop('compact', None)
+    expanded.attrs['rupees'] = True
+    for col in PAISE_COLUMNS:
+        if col in expanded.columns:
+            expanded[col] = expanded[col].astype('float64') / 100
+    if 'Withdrawal Amt.' not in expanded.columns and 'Amount' in expanded.columns:
+        expanded['Withdrawal Amt.'] = (-expanded['Amount']).clip(lower=0)
+        expanded['Deposit Amt.'] = expanded['Amount'].clip(lower=0)
+    for col in expanded.columns:
+        if isinstance(expanded[col].dtype, pd.CategoricalDtype):
+            expanded[col] = expanded[col].astype(object)
+    if 'id' in expanded.columns:
+        expanded['id'] = expanded['id'].astype('int64')
+    return expanded
+
+def memory_report(df):
+    """Per-column dtype and bytes of a dataset next to its size in the pre-compaction layout"""
+    usage = df.memory_usage(deep=True, index=False)
+    compact_bytes = int(usage.sum())
+    expanded_bytes = int(expand_transactions(df).memory_usage(deep=True, index=False).sum())
+    return {
+        "rows": len(df),
+        "bytes": compact_bytes,
+        "expanded_bytes": expanded_bytes,
+        "reduction": round(1 - compact_bytes / expanded_bytes, 3) if expanded_bytes else 0.0,
+        "columns": [{"name": col, "dtype": str(df[col].dtype), "bytes": int(usage[col])} for col in df.columns]
+    }
+
+def set_rows(df, rows, column, values):
+    """df.iloc[rows, column] = values, adding unseen values to a categorical column first"""
+    if isinstance(df[column].dtype, pd.CategoricalDtype):
+        new = pd.Index(np.atleast_1d(np.asarray(values, dtype=object))).unique().difference(df[column].cat.categories)
+        if len(new):
+            df[column] = df[column].cat.add_categories(new)
+    df.iloc[rows, df.columns.get_loc(column)] = values
+
+# Statement date layouts tried in order, day-first before month-first so ambiguous files read as before
+DATE_FORMATS = ['%d-%m-%Y', '%d/%m/%Y', '%d-%m-%y', '%d/%m/%y', '%d.%m.%Y', '%Y-%m-%d', '%Y/%m/%d',
+                '%d-%b-%Y', '%d %b %Y', '%d-%b-%y', '%d %b %y', '%m/%d/%Y', '%m-%d-%Y', '%Y-%m-%d %H:%M:%S']
+
+# Distinct dates examined when detecting a file's date format
+DATE_SAMPLE_SIZE = 1000
+
+def detect_date_format(values):
+    """The first of DATE_FORMATS that parses every sampled date of a column, or None"""
+    sample = pd.Series(values.dropna().astype(str).str.strip().unique()[:DATE_SAMPLE_SIZE])
+    sample = sample[sample != '']
+    if sample.empty:
+        return None
+    for date_format in DATE_FORMATS:
+        if pd.to_datetime(sample, format=date_format, errors='coerce').notna().all():
+            return date_format
+    return None
+
+def parse_dates(values, date_format=None):
+    """Datetimes of a Date column, parsed with one explicit format.
+    
+    The format is detected from the values unless given; when no candidate
+    fits, dates are inferred day-first. Parsed columns pass through and
+    categoricals are parsed once per distinct date. Unparseable dates are NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        parsed = parse_dates(pd.Series(values.cat.categories.astype(str)), date_format).to_numpy()
+        codes = values.cat.codes.to_numpy()
+        return pd.Series(np.where(codes >= 0, parsed[codes], np.datetime64('NaT')), index=values.index)
+    date_format = date_format or detect_date_format(values)
+    text = values.astype(str).str.strip()
+    if date_format is None:
+        return pd.to_datetime(text, dayfirst=True, errors='coerce')
+    return pd.to_datetime(text, format=date_format, errors='coerce')
+
+def index_by_date(df):
+    """df ordered by Date (stable, undated rows last) with a DatetimeIndex over the dates.
+    
+    Datasets are kept in this order so date lookups can use the sorted index
+    instead of scanning and re-parsing the Date column.
+    """
+    if not df['Date'].is_monotonic_increasing:
+        df = df.sort_values('Date', kind='stable', na_position='last', ignore_index=True)
+    df.index = pd.DatetimeIndex(df['Date'].to_numpy())
+    return df
+
+def contains_text(values, text):
+    """Case-insensitive substring mask; categoricals are matched once per distinct value"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        hits = values.cat.categories.astype(str).str.contains(text, case=False, regex=False).to_numpy()
+        codes = values.cat.codes.to_numpy()
+        return np.where(codes >= 0, hits[codes], False)
+    return values.astype(str).str.contains(text, case=False, regex=False).to_numpy()
+
+def _register_dataset(dataset_id, df, version, aggregates=None, edits=0):
+    """Make df the resident copy of dataset_id and evict LRU datasets over budget.
+    
+    Every dataset is persisted on write, so eviction only drops the in-memory
+    copy; the next request for it reloads from disk. Caller holds the lock.
+    """
+    # Edits write back the same frame with the same ids, so its id index,
+    # fingerprints and (delta-maintained) aggregates stay valid
+    previous = _datasets.get(dataset_id)
+    id_index = None
+    fingerprints = None
+    if previous is not None and previous['df'] is df:
+        id_index = previous['id_index']
+        fingerprints = previous['fingerprints']
+        aggregates = aggregates or previous['aggregates']
+    _datasets[dataset_id] = {'df': df, 'version': version, 'edits': edits, 'nbytes': int(df.memory_usage(deep=True).sum()),
+                             'id_index': id_index, 'fingerprints': fingerprints, 'aggregates': aggregates}
+    _datasets.move_to_end(dataset_id)
+    
+    total = sum(entry['nbytes'] for entry in _datasets.values())
+    for resident_id in list(_datasets):
+        if total <= MEMORY_BUDGET_BYTES:
+            break
+        if resident_id != dataset_id:
+            total -= _datasets.pop(resident_id)['nbytes']
+
+def save_dataset(dataset_id, df, aggregates=None):
+    """Persist a dataset and make it the resident in-process copy.
+    
+    df is converted to the compact layout (see compact_transactions) in place.
+    The file is written uncompressed so it can be memory-mapped on load, and
+    swapped in atomically so other worker processes never see a partial write.
+    The file then holds every logged edit, so the edit log is cleared.
+    Callers that already know the category aggregates of df can pass them.
+    """
+    compact_transactions(df)
+    table = _to_arrow_table(df)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), AMOUNT_UNIT_KEY: b'paise'})
+    replace_file(dataset_path(dataset_id), lambda tmp_path: feather.write_feather(table, tmp_path, compression='uncompressed'))
+    try:
+        os.remove(edits_path(dataset_id))
+    except FileNotFoundError:
+        pass
+    with _datasets_lock:
+        _register_dataset(dataset_id, df, dataset_version(dataset_id), aggregates)
+
+def save_edit(dataset_id, df, rows, categories, custom_names):
+    """Persist a recategorization of df (see recategorize_rows) by appending it to the edit log.
+    
+    Costs O(rows edited) instead of rewriting the dataset file; the log is
+    replayed on load, and folded into the file by save_dataset once it
+    holds EDIT_LOG_MAX_ENTRIES edits. Callers hold dataset_lock.
+    """
+    rows = np.atleast_1d(rows)
+    edit = {
+        'ids': df['id'].to_numpy()[rows].tolist(),
+        'category': np.broadcast_to(np.asarray(categories, dtype=object), len(rows)).tolist(),
+        'custom_name': np.broadcast_to(np.asarray(custom_names, dtype=object), len(rows)).tolist()
+    }
+    with open(edits_path(dataset_id), 'a') as f:
+        f.write(json.dumps(edit) + '\n')
+    with _datasets_lock:
+        entry = _datasets.get(dataset_id)
+        if entry is None or entry['df'] is not df:
+            return
+        entry['version'] = dataset_version(dataset_id)
+        entry['edits'] += 1
+        pending = entry['edits']
+    if pending >= EDIT_LOG_MAX_ENTRIES:
+        save_dataset(dataset_id, df)
+
+def replay_edits(dataset_id, df):
+    """Apply a dataset's logged edits to df, freshly loaded from its file; returns how many there were"""
+    try:
+        with open(edits_path(dataset_id)) as f:
+            lines = f.readlines()
+    except FileNotFoundError:
+        return 0
+    positions = pd.Index(df['id'])
+    replayed = 0
+    for line in lines:
+        if not line.endswith('\n'):
+            break  # an edit still being appended by another process
+        edit = json.loads(line)
+        rows = positions.get_indexer(edit['ids'])
+        found = rows >= 0
+        set_rows(df, rows[found], 'Category', np.asarray(edit['category'], dtype=object)[found])
+        set_rows(df, rows[found], 'custom_name', np.asarray(edit['custom_name'], dtype=object)[found])
+        replayed += 1
+    return replayed
+
+def load_dataset(dataset_id):
+    """Return a dataset, or None if nothing has been uploaded under that id.
+    
+    Loaded lazily from the memory-mapped Arrow file, plus its edit log, when
+    not resident and reloaded only when another process has replaced the file
+    or logged an edit.
+    """
+    try:
+        version = dataset_version(dataset_id)
+    except FileNotFoundError:
+        return None
+    
+    with _datasets_lock:
+        entry = _datasets.get(dataset_id)
+        if entry is not None and entry['version'] == version:
+            _datasets.move_to_end(dataset_id)
+            return entry['df']
         
-        # Check if DataFrame is empty
-        if df.empty:
-            return jsonify({"error": "The uploaded CSV file is empty"}), 400
+        table = feather.read_table(dataset_path(dataset_id), memory_map=True)
+        df = table.to_pandas()
+        if (table.schema.metadata or {}).get(AMOUNT_UNIT_KEY) != b'paise':
+            df.attrs['rupees'] = True  # datasets saved before amounts were kept in paise
+        df = compact_transactions(df)
+        df['Date'] = parse_dates(df['Date'])  # datasets saved before dates were parsed at ingest
+        df = index_by_date(df)
+        # Edits write these in place, so they get their own buffers; the rest stays on the read-only memory map
+        for column in ('Category', 'custom_name'):
+            df[column] = df[column].copy()
+        _register_dataset(dataset_id, df, version, edits=replay_edits(dataset_id, df))
+        return df
+
+def rules_path(dataset_id):
+    return os.path.join(DATA_DIR, f"{dataset_id}.rules.json")
+
+def load_keyword_rules(dataset_id):
+    """Saved custom keyword rules of a dataset, oldest first"""
+    try:
+        with open(rules_path(dataset_id)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+def save_keyword_rule(dataset_id, category, keywords):
+    """Store a keyword rule so later uploads to this dataset apply it during ingest.
+    
+    A new rule for an existing category merges the keywords and moves the rule
+    to the end, since the most recent rule wins.
+    """
+    rules = load_keyword_rules(dataset_id)
+    merged = [k for rule in rules if rule['category'] == category for k in rule['keywords']]
+    merged += [k for k in keywords if k not in merged]
+    rules = [rule for rule in rules if rule['category'] != category]
+    rules.append({'category': category, 'keywords': merged})
+    
+    def write(tmp_path):
+        with open(tmp_path, 'w') as f:
+            json.dump(rules, f)
+    replace_file(rules_path(dataset_id), write)
+
+def id_index(dataset_id, df):
+    """Hash index of transaction id -> row position, built once per loaded dataset"""
+    with _datasets_lock:
+        entry = _datasets.get(dataset_id)
+        if entry is None or entry['df'] is not df:
+            return pd.Index(df['id'])
+        if entry['id_index'] is None:
+            entry['id_index'] = pd.Index(df['id'])
+        return entry['id_index']
+
+def find_row(dataset_id, df, transaction_id):
+    """Row position of a transaction id, or None if the dataset has no such id"""
+    try:
+        return id_index(dataset_id, df).get_loc(transaction_id)
+    except KeyError:
+        return None
+
+# Columns that identify a transaction across overlapping statements
+# (Withdrawal/Deposit Amt. are the two sides of Amount, which compact datasets keep alone)
+FINGERPRINT_COLUMNS = ['Date', 'Description', 'Amount', 'Closing Balance']
+
+def transaction_fingerprints(df):
+    """64-bit hash per row of date, narration, amounts and closing balance.
+    
+    Values are normalized first (stripped text, amounts in paise) so the same
+    transaction hashes alike whichever parser read it and whether or not the
+    frame has been compacted.
+    """
+    key = pd.DataFrame(index=pd.RangeIndex(len(df)))
+    for column in FINGERPRINT_COLUMNS:
+        if column not in df.columns:
+            continue
+        if column in ('Date', 'Description'):
+            key[column] = df[column].astype(str).str.strip().to_numpy()
+        else:
+            key[column] = df[column].astype('Int64').to_numpy()
+    return pd.util.hash_pandas_object(key, index=False).to_numpy()
+
+def dataset_fingerprints(dataset_id, df):
+    """Hash index of the fingerprints of a dataset's rows, built once per loaded dataset"""
+    with _datasets_lock:
+        entry = _datasets.get(dataset_id)
+        if entry is None or entry['df'] is not df:
+            return pd.Index(transaction_fingerprints(df))
+        if entry['fingerprints'] is None:
+            entry['fingerprints'] = pd.Index(transaction_fingerprints(df))
+        return entry['fingerprints']
+
+def drop_duplicate_transactions(df, known=None, sources=None):
+    """Drop rows already loaded (fingerprints in `known`) or repeated from another file.
+    
+    A row with a closing balance is identified by it, so its repeats are
+    duplicates even within one file. Without a balance, identical rows of one
+    file are separate real transactions (two equal payments to the same
+    merchant on the same day): the n-th copy of a fingerprint in a file is
+    dropped only if `known`, or an earlier file of the upload (`sources`
+    holds each row's file number), already has n copies of it.
+    All checks are hash lookups, so this is O(n) in the rows involved.
+    Returns the remaining rows and how many were dropped.
+    """
+    fingerprints = transaction_fingerprints(df)
+    sources = np.zeros(len(df), dtype=np.int64) if sources is None else np.asarray(sources)
+    occurrence = pd.Series(fingerprints).groupby([fingerprints, sources]).cumcount().to_numpy(copy=True)
+    if 'Closing Balance' in df.columns:
+        occurrence[df['Closing Balance'].notna().to_numpy()] = 0
+    duplicate = pd.MultiIndex.from_arrays([fingerprints, occurrence]).duplicated(keep='first')
+    if known is not None and len(known):
+        known_copies = known.value_counts().reindex(fingerprints, fill_value=0).to_numpy()
+        duplicate |= occurrence < known_copies
+    dropped = int(duplicate.sum())
+    if dropped:
+        df = df[~duplicate].reset_index(drop=True)
+    return df, dropped
+
+def category_aggregates(df):
+    """Per-category totals of df: expense amount (integer paise) and count by
+    display category (custom_name if set, otherwise Category) and row count by Category."""
+    counts = df['Category'].value_counts()
+    aggregates = {
+        'expense_amount': {},
+        'expense_count': {},
+        'category_count': counts[counts > 0].to_dict()
+    }
+    amounts = paise_array(df['Amount'])
+    expense = amounts < 0
+    if not expense.any():
+        return aggregates
+    
+    # Column-wise display category: object truthiness matches `custom_name if custom_name else Category`
+    custom_names = df['custom_name'].to_numpy(dtype=object)[expense]
+    display_category = np.where(custom_names.astype(bool), custom_names, df['Category'].to_numpy(dtype=object)[expense])
+    
+    grouped = pd.Series(-amounts[expense]).groupby(display_category).agg(['sum', 'count'])
+    aggregates['expense_amount'] = grouped['sum'].to_dict()
+    aggregates['expense_count'] = grouped['count'].to_dict()
+    return aggregates
+
+def merge_aggregates(total, delta, sign=1):
+    """Add delta into the running aggregates in place (sign=-1 removes it)"""
+    for key in ('expense_amount', 'expense_count', 'category_count'):
+        for category, value in delta[key].items():
+            total[key][category] = total[key].get(category, 0) + sign * value
+    
+    for category in [c for c, n in total['expense_count'].items() if n <= 0]:
+        del total['expense_count'][category]
+        del total['expense_amount'][category]
+    for category in [c for c, n in total['category_count'].items() if n <= 0]:
+        del total['category_count'][category]
+    return total
+
+def dataset_aggregates(dataset_id, df):
+    """Running category aggregates of a dataset, computed once per loaded dataset"""
+    with _datasets_lock:
+        entry = _datasets.get(dataset_id)
+        if entry is None or entry['df'] is not df:
+            return category_aggregates(df)
+        if entry['aggregates'] is None:
+            entry['aggregates'] = category_aggregates(df)
+        return entry['aggregates']
+
+def recategorize_rows(dataset_id, df, rows, categories, custom_names):
+    """Write Category/custom_name at unique row positions, updating the aggregates by delta.
+    
+    The delta is applied to a copy that then replaces the resident
+    aggregates, so readers never see a half-updated dict. Callers hold
+    dataset_lock (see writes_dataset).
+    """
+    aggregates = copy.deepcopy(dataset_aggregates(dataset_id, df))
+    before = category_aggregates(df.iloc[rows])
+    set_rows(df, rows, 'Category', categories)
+    set_rows(df, rows, 'custom_name', custom_names)
+    merge_aggregates(aggregates, before, -1)
+    merge_aggregates(aggregates, category_aggregates(df.iloc[rows]), 1)
+    with _datasets_lock:
+        entry = _datasets.get(dataset_id)
+        if entry is not None and entry['df'] is df:
+            entry['aggregates'] = aggregates
+
+def transaction_not_found(df, transaction_id):
+    return jsonify({
+        "error": f"Transaction ID {transaction_id} not found. Available IDs: {df['id'].head(10).tolist()}..."  # Show first 10 IDs
+    }), 404
+
+# Rows per chunk for streaming ingestion (/api/upload_csv?mode=stream)
+DEFAULT_CHUNK_SIZE = 50000
+
+def categorize_transactions(df, rules=()):
+    """Set Category (through the narration cache) and a blank custom_name, then
+    apply the dataset's saved keyword rules on top. Modifies df in place."""
+    # Initialize Category column
+    df['Category'] = categorize_cached(df['Description'])
+    
+    # Add custom_name column for custom categories
+    df['custom_name'] = ''
+    
+    # Re-apply the dataset's custom keyword rules
+    if rules:
+        apply_keyword_rules(df, rules)
+    return df
+
+def clean_transactions(df, rules=(), date_format=None, categorize=True):
+    """Clean and categorize a parsed statement frame (or one chunk of it).
+    
+    Saved custom keyword rules are applied on top of the built-in categories
+    (see categorize_transactions); categorize=False leaves that to the caller.
+    Dates are parsed with date_format, or with the format detected from this
+    frame, which is left in df.attrs['date_format'] for the file's next chunks.
+    Raises ValueError with a user-facing message if the layout is not supported.
+    """
+    # Remove duplicate header row if it exists
+    if len(df) > 0 and df.iloc[0].equals(df.columns):
+        df = df.drop(df.index[0]).reset_index(drop=True)
+    
+    # Clean column names (remove extra spaces)
+    df.columns = df.columns.str.strip()
+    
+    # Validate required columns based on different CSV formats
+    required_columns_found = False
+    
+    # Check for the specific format mentioned: Date, Narration, Unnamed: 2, Value Dt, Withdrawal Amt., Deposit Amt., Closing Balance
+    if 'Withdrawal Amt.' in df.columns and 'Deposit Amt.' in df.columns:
+        # Convert to numeric, handling various formats (columns from read_bank_statement are numeric already)
+        for column in ('Withdrawal Amt.', 'Deposit Amt.'):
+            if pd.api.types.is_numeric_dtype(df[column]):
+                df[column] = df[column].fillna(0)
+            else:
+                df[column] = pd.to_numeric(df[column].astype(str).str.replace(',', '').replace('', '0'), errors='coerce').fillna(0)
         
-        # Remove duplicate header row if it exists
-        if len(df) > 0 and df.iloc[0].equals(df.columns):
-            df = df.drop(df.index[0]).reset_index(drop=True)
+        # Create a unified Amount column (negative for withdrawals, positive for deposits)
+        df['Amount'] = df['Deposit Amt.'] - df['Withdrawal Amt.']
         
-        # Clean column names (remove extra spaces)
-        df.columns = df.columns.str.strip()
+        # Use Narration as Description
+        if 'Narration' in df.columns:
+            df['Description'] = df['Narration'].fillna('No description')
+        else:
+            df['Description'] = 'No description'
+            
+        required_columns_found = True
         
-        # Validate required columns based on different CSV formats
-        required_columns_found = False
+    # Check for standard expense format (Amount column exists)
+    elif 'Amount' in df.columns:
+        df['Amount'] = pd.to_numeric(df['Amount'].astype(str).str.replace(',', ''), errors='coerce')
         
-        # Check for the specific format mentioned: Date, Narration, Unnamed: 2, Value Dt, Withdrawal Amt., Deposit Amt., Closing Balance
-        if 'Withdrawal Amt.' in df.columns and 'Deposit Amt.' in df.columns:
-            # Convert to numeric, handling various formats
-            df['Withdrawal Amt.'] = pd.to_numeric(df['Withdrawal Amt.'].astype(str).str.replace(',', '').replace('', '0'), errors='coerce').fillna(0)
-            df['Deposit Amt.'] = pd.to_numeric(df['Deposit Amt.'].astype(str).str.replace(',', '').replace('', '0'), errors='coerce').fillna(0)
-            
-            # Create a unified Amount column (negative for withdrawals, positive for deposits)
-            df['Amount'] = df['Deposit Amt.'] - df['Withdrawal Amt.']
-            
-            # Use Narration as Description
+        # Check for Description column variants
+        if 'Description' not in df.columns:
             if 'Narration' in df.columns:
                 df['Description'] = df['Narration'].fillna('No description')
+            elif 'Transaction' in df.columns:
+                df['Description'] = df['Transaction'].fillna('No description')
             else:
                 df['Description'] = 'No description'
                 
-            required_columns_found = True
-            
-        # Check for standard expense format (Amount column exists)
-        elif 'Amount' in df.columns:
-            df['Amount'] = pd.to_numeric(df['Amount'].astype(str).str.replace(',', ''), errors='coerce')
-            
-            # Check for Description column variants
-            if 'Description' not in df.columns:
-                if 'Narration' in df.columns:
-                    df['Description'] = df['Narration'].fillna('No description')
-                elif 'Transaction' in df.columns:
-                    df['Description'] = df['Transaction'].fillna('No description')
-                else:
-                    df['Description'] = 'No description'
-                    
-            required_columns_found = True
+        required_columns_found = True
+    
+    if not required_columns_found:
+        raise ValueError("CSV must contain either 'Amount' column or 'Withdrawal Amt.' and 'Deposit Amt.' columns")
+    
+    # Ensure Date column exists
+    if 'Date' not in df.columns:
+        raise ValueError("CSV must contain a 'Date' column")
+    
+    # Parse dates once here with the file's format; everything downstream reuses them
+    date_format = date_format or detect_date_format(df['Date'])
+    df['Date'] = parse_dates(df['Date'], date_format)
+    df.attrs['date_format'] = date_format
+    
+    # Amounts are integer paise from here on; Withdrawal/Deposit Amt. stay in rupees
+    for column in PAISE_COLUMNS:
+        if column in df.columns:
+            df[column] = to_paise(df[column])
+    
+    # Remove rows with NaN amounts
+    df = df.dropna(subset=['Amount'])
+    return categorize_transactions(df, rules) if categorize else df
+
+# Layout of the bank statement export; files with this header skip pandas type inference
+BANK_STATEMENT_COLUMNS = ['Date', 'Narration', 'Value Dt', 'Withdrawal Amt.', 'Deposit Amt.', 'Closing Balance']
+BANK_AMOUNT_COLUMNS = ['Withdrawal Amt.', 'Deposit Amt.', 'Closing Balance']
+
+def read_bank_statement(data):
+    """Parse a bank statement export with pyarrow's multithreaded CSV reader.
+    
+    The known columns are read as strings with an explicit schema and the
+    amount columns are cast to float after stripping thousands separators.
+    Returns None if the header is not the bank layout or a value does not
+    parse, so the caller can fall back to the generic pd.read_csv path.
+    """
+    first_line = data.split(b'\n', 1)[0].decode('utf-8-sig', errors='replace')
+    raw_columns = next(csv.reader([first_line]), [])
+    columns = {raw: raw.strip() for raw in raw_columns}
+    if len(columns) != len(raw_columns) or not set(BANK_STATEMENT_COLUMNS) <= set(columns.values()):
+        return None
+    
+    known = {raw: pa.string() for raw, name in columns.items() if name in BANK_STATEMENT_COLUMNS}
+    try:
+        table = pacsv.read_csv(
+            io.BytesIO(data),
+            read_options=pacsv.ReadOptions(use_threads=True),
+            convert_options=pacsv.ConvertOptions(column_types=known, strings_can_be_null=True)
+        )
+        for raw, name in columns.items():
+            if name in BANK_AMOUNT_COLUMNS:
+                amounts = pc.cast(pc.replace_substring(table[raw], ',', ''), pa.float64())
+                table = table.set_column(table.schema.get_field_index(raw), raw, amounts)
+    except pa.ArrowInvalid:
+        return None
+    return table.to_pandas()
+
+def read_transactions_chunked(file, chunk_size=DEFAULT_CHUNK_SIZE, rules=()):
+    """Stream a CSV in fixed-size chunks, cleaning each one as it arrives.
+    
+    Only one raw chunk is alive at a time, and each cleaned chunk is
+    compacted (integer paise, categoricals) before it is kept, so the working
+    set grows with the compact size of the file rather than its raw size.
+    Returns the combined frame, the number of rows kept from each chunk and
+    the category aggregates merged per chunk.
+    """
+    cleaned_chunks = []
+    rows_per_chunk = []
+    aggregates = {'expense_amount': {}, 'expense_count': {}, 'category_count': {}}
+    date_format = None
+    for chunk in pd.read_csv(file, chunksize=chunk_size):
+        if chunk.empty:
+            continue
+        # The date format is detected on the first chunk and reused for the rest of the file
+        cleaned = clean_transactions(chunk, rules, date_format)
+        date_format = cleaned.attrs.get('date_format')
+        cleaned_chunks.append(cleaned)
+        rows_per_chunk.append(len(cleaned))
+        merge_aggregates(aggregates, category_aggregates(cleaned))
+        compact_transactions(cleaned, drop_redundant=False)
+    
+    if not cleaned_chunks:
+        return pd.DataFrame(), rows_per_chunk, aggregates
+    return concat_compact(cleaned_chunks), rows_per_chunk, aggregates
+
+# Worker processes used to parse several uploaded statements at once
+INGEST_WORKERS = int(os.environ.get('EXPENSE_INGEST_WORKERS', os.cpu_count() or 1))
+_ingest_pool = None
+_ingest_pool_lock = threading.Lock()
+
+def ingest_pool():
+    """Return the shared process pool for multi-file uploads, starting it on first use.
+    
+    Workers are spawned rather than forked: forking the threaded server can
+    copy a lock held by another thread into the child and deadlock it.
+    """
+    global _ingest_pool
+    with _ingest_pool_lock:
+        if _ingest_pool is None:
+            _ingest_pool = ProcessPoolExecutor(max_workers=INGEST_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return _ingest_pool
+
+def ingest_statement(data):
+    """Parse and clean one statement's raw bytes, without categorizing (runs in a worker process)"""
+    df = read_bank_statement(data)
+    if df is None:
+        df = pd.read_csv(io.BytesIO(data))
+    if df.empty:
+        raise ValueError("The uploaded CSV file is empty")
+    return clean_transactions(df, categorize=False)
+
+def read_statements_parallel(files, rules=()):
+    """Parse several statements in the process pool and merge them into one frame.
+    
+    Each file's dates are parsed with its own detected format. The merged
+    frame is categorized here, in one pass through this process's narration
+    cache, so statements with overlapping narrations share cached results.
+    Rows are ordered by transaction date (stable, so same-day rows keep their
+    file order); ids are assigned by the caller after merging so they are
+    unique across files. Returns the merged frame, the row count of each
+    file, its category aggregates and the file number of each merged row
+    (see drop_duplicate_transactions).
+    """
+    futures = [ingest_pool().submit(ingest_statement, file.read()) for file in files]
+    frames = []
+    for file, future in zip(files, futures):
+        try:
+            frames.append(future.result())
+        except ValueError as e:
+            raise ValueError(f"{file.filename}: {e}")
+    
+    merged = categorize_transactions(pd.concat(frames, ignore_index=True), rules)
+    aggregates = category_aggregates(merged)
+    sources = np.repeat(np.arange(len(frames)), [len(df) for df in frames])
+    order = np.argsort(merged['Date'].to_numpy(), kind='stable')  # NaT sorts last, as in index_by_date
+    merged = index_by_date(merged.iloc[order].reset_index(drop=True))
+    return merged, [len(df) for df in frames], aggregates, sources[order]
+
+@app.route("/api/upload_csv", methods=["POST"])
+@writes_dataset
+def upload_csv():
+    dataset_id = resolve_dataset_id()
+    
+    try:
+        if 'file' not in request.files:
+            return jsonify({"error": "No file provided"}), 400
         
-        if not required_columns_found:
-            return jsonify({"error": "CSV must contain either 'Amount' column or 'Withdrawal Amt.' and 'Deposit Amt.' columns"}), 400
+        # Several 'file' parts are merged into one dataset (see read_statements_parallel)
+        files = request.files.getlist('file')
+        file = files[0]
+        for f in files:
+            if f.filename == '':
+                return jsonify({"error": "No file selected"}), 400
+            if not f.filename.endswith('.csv'):
+                return jsonify({"error": "Please upload a CSV file"}), 400
         
-        # Ensure Date column exists
-        if 'Date' not in df.columns:
-            return jsonify({"error": "CSV must contain a 'Date' column"}), 400
+        streaming = request.args.get('mode', request.form.get('mode', '')) == 'stream'
+        # append=true adds the new rows to the dataset instead of replacing it
+        append = request.args.get('append', request.form.get('append', '')).lower() in ('1', 'true', 'yes')
+        rules = load_keyword_rules(dataset_id)
+        rows_per_chunk = None
+        rows_per_file = None
+        sources = None
+        aggregates = None
         
-        # Initialize Category column
-        df['Category'] = df['Description'].apply(categorize_transaction)
+        try:
+            if len(files) > 1:
+                df, rows_per_file, aggregates, sources = read_statements_parallel(files, rules)
+            elif streaming:
+                try:
+                    chunk_size = int(request.args.get('chunk_size', request.form.get('chunk_size', DEFAULT_CHUNK_SIZE)))
+                except (ValueError, TypeError):
+                    return jsonify({"error": "chunk_size must be an integer"}), 400
+                if chunk_size <= 0:
+                    return jsonify({"error": "chunk_size must be positive"}), 400
+                
+                df, rows_per_chunk, aggregates = read_transactions_chunked(file, chunk_size, rules)
+                if not rows_per_chunk:
+                    return jsonify({"error": "The uploaded CSV file is empty"}), 400
+            else:
+                # Read CSV file, through the schema-driven parser when it is a bank statement export
+                data = file.read()
+                df = read_bank_statement(data)
+                if df is None:
+                    df = pd.read_csv(io.BytesIO(data))
+                
+                # Check if DataFrame is empty
+                if df.empty:
+                    return jsonify({"error": "The uploaded CSV file is empty"}), 400
+                
+                df = clean_transactions(df, rules)
+                aggregates = category_aggregates(df)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        # Add custom_name column for custom categories
-        df['custom_name'] = ''
+        # Drop transactions repeated across the uploaded files or, when
+        # appending, already present in the dataset (overlapping statement periods)
+        existing = load_dataset(dataset_id) if append else None
+        known = dataset_fingerprints(dataset_id, existing) if existing is not None else None
+        df, duplicates_dropped = drop_duplicate_transactions(df, known, sources)
+        if duplicates_dropped:
+            aggregates = category_aggregates(df)
         
-        # Remove rows with NaN amounts
-        df = df.dropna(subset=['Amount'])
+        # Datasets are stored in date order, so ids follow the dates of each upload
+        df = index_by_date(df)
         
-        # Add an 'id' column after cleaning the data
-        df['id'] = range(1, len(df) + 1)
+        # Add an 'id' column after cleaning the data, continuing after existing ids when appending
+        first_id = int(existing['id'].max()) + 1 if existing is not None and len(existing) else 1
+        df['id'] = range(first_id, first_id + len(df))
+        added = len(df)
+        if existing is not None and added:
+            aggregates = merge_aggregates(copy.deepcopy(dataset_aggregates(dataset_id, existing)), aggregates)
+            # Same layout on both sides; the union's categoricals are re-interned when it is saved
+            df = index_by_date(pd.concat([existing, compact_transactions(df)], ignore_index=True))
+            df.attrs.pop('compact', None)
+        elif existing is not None:
+            df, aggregates = existing, dataset_aggregates(dataset_id, existing)
         
-        # Store in global variable
-        df_global = df
+        # Persist and make it the caller's current dataset
+        save_dataset(dataset_id, df, aggregates)
         
         # Count categories
-        category_counts = df['Category'].value_counts().to_dict()
+        category_counts = dict(aggregates['category_count'])
         
-        return jsonify({
+        response = {
             "message": "File processed successfully",
+            "dataset_id": dataset_id,
             "total_transactions": len(df),
             "categories": category_counts,
-            "other_count": category_counts.get('Other', 0)
-        }), 200
+            "other_count": category_counts.get('Other', 0),
+            "duplicates_dropped": duplicates_dropped
+        }
+        if existing is not None:
+            response["appended"] = added
+        if rows_per_chunk is not None:
+            response["chunks"] = len(rows_per_chunk)
+            response["rows_per_chunk"] = rows_per_chunk
+        if rows_per_file is not None:
+            response["files"] = [{"filename": f.filename, "transactions": n} for f, n in zip(files, rows_per_file)]
+        
+        return jsonify(response), 200
         
     except Exception as e:
         error_msg = f"Error processing file: {str(e)}"
         return jsonify({"error": error_msg}), 500
 
+# Columns returned by the transaction listing endpoints
+DISPLAY_COLUMNS = ['id', 'Date', 'Description', 'Amount', 'Category', 'custom_name']
+
+# Upper bound for ?limit= on paginated listings
+MAX_PAGE_SIZE = 1000
+
+def _parse_date_param(name):
+    # ISO 8601 (the format dates are returned in) first, then day-first like the statements
+    value = request.args.get(name)
+    parsed = pd.to_datetime(value, format='ISO8601', errors='coerce')
+    if pd.isna(parsed):
+        parsed = pd.to_datetime(value, dayfirst=True, errors='coerce')
+    if pd.isna(parsed):
+        raise ValueError(f"Invalid '{name}' date: {value}")
+    return parsed
+
+def _parse_amount_param(name):
+    value = request.args.get(name)
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid '{name}' amount: {value}")
+
+def date_window(df):
+    """Row slice of a date-indexed dataset covering the request's from/to dates (inclusive).
+    
+    Both bounds are binary searches on the sorted DatetimeIndex (see
+    index_by_date), so a window of k rows costs O(log n + k) however long the
+    dataset is. Undated rows, kept last, fall outside any bounded window.
+    Raises ValueError on malformed dates.
+    """
+    args = request.args
+    if not (args.get('from') or args.get('to')):
+        return slice(0, len(df))
+    start = df.index.searchsorted(_parse_date_param('from')) if args.get('from') else 0
+    if args.get('to'):
+        end = df.index.searchsorted(_parse_date_param('to') + pd.Timedelta(days=1))
+    else:
+        end = df.index.searchsorted(pd.NaT)  # start of the undated tail, len(df) if there is none
+    return slice(start, max(start, end))
+
+def filter_transactions(df, mask=None):
+    """Rows of df matching the request's filters, starting from an optional row mask.
+    
+    Supported query parameters: from/to (inclusive dates, see date_window),
+    category (repeatable), min_amount/max_amount and q (case-insensitive
+    Description substring). Raises ValueError on malformed parameters.
+    """
+    args = request.args
+    window = date_window(df)
+    df = df.iloc[window]
+    mask = np.ones(len(df), dtype=bool) if mask is None else np.asarray(mask, dtype=bool)[window]
+    
+    categories = [c for c in args.getlist('category') if c]
+    if categories:
+        mask &= df['Category'].isin(categories).to_numpy()
+    
+    # Stored amounts are integer paise
+    if args.get('min_amount'):
+        mask &= paise_array(df['Amount']) >= round(_parse_amount_param('min_amount') * 100)
+    if args.get('max_amount'):
+        mask &= paise_array(df['Amount']) <= round(_parse_amount_param('max_amount') * 100)
+    
+    if args.get('q'):
+        mask &= contains_text(df['Description'], args['q'])
+    
+    return df if mask.all() else df[mask]
+
+ARROW_STREAM_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+def wants_arrow():
+    """True if the client asked for an Arrow IPC stream over JSON"""
+    return request.accept_mimetypes[ARROW_STREAM_MIMETYPE] > request.accept_mimetypes['application/json']
+
+def frame_response(frame, meta=None):
+    """Serialize a result frame column-wise as an Arrow IPC stream or JSON records.
+    
+    NaN becomes null and timestamps stay timestamps in both encodings (ISO 8601
+    strings in JSON). Envelope fields in meta are sent as X-* headers with
+    Arrow and wrap the records as {..., "data": [...]} with JSON.
+    """
+    frame = frame.reset_index(drop=True)
+    if wants_arrow():
+        sink = io.BytesIO()
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        with ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        response = Response(sink.getvalue(), mimetype=ARROW_STREAM_MIMETYPE)
+        for key, value in (meta or {}).items():
+            response.headers[f"X-{key.replace('_', '-').title()}"] = '' if value is None else str(value)
+        return response
+    
+    records = frame.to_json(orient='records', date_format='iso')
+    if meta is None:
+        return Response(records, mimetype='application/json')
+    # Envelope members are encoded one by one; the records array is already JSON
+    members = [f'{json.dumps(str(key))}: {json.dumps(value)}' for key, value in meta.items()]
+    members.append(f'"data": {records}')
+    return Response('{' + ', '.join(members) + '}', mimetype='application/json')
+
+def in_rupees(frame):
+    """A result frame with its integer-paise amount columns converted to rupees"""
+    converted = {col: frame[col] / 100 for col in PAISE_COLUMNS if col in frame.columns}
+    return frame.assign(**converted) if converted else frame
+
+def transactions_response(df):
+    """JSON listing of df with optional fields= projection and offset/limit pagination.
+    
+    Without offset or limit the whole (filtered) list is returned as before;
+    with either, the page comes with total and next_offset.
+    """
+    args = request.args
+    columns = [col for col in DISPLAY_COLUMNS if col in df.columns]
+    if args.get('fields'):
+        fields = [f.strip() for f in args['fields'].split(',') if f.strip()]
+        unknown = [f for f in fields if f not in columns]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(columns)}")
+        columns = fields
+    
+    if 'offset' not in args and 'limit' not in args:
+        return frame_response(in_rupees(df[columns]))
+    
+    try:
+        offset = int(args.get('offset', 0))
+        limit = int(args.get('limit', MAX_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("offset and limit must be integers")
+    if offset < 0 or limit <= 0:
+        raise ValueError("offset must be >= 0 and limit must be > 0")
+    limit = min(limit, MAX_PAGE_SIZE)
+    
+    page = df.iloc[offset:offset + limit]
+    next_offset = offset + limit if offset + limit < len(df) else None
+    return frame_response(in_rupees(page[columns]), {
+        "total": len(df),
+        "offset": offset,
+        "limit": limit,
+        "next_offset": next_offset
+    })
+
 @app.route("/api/get_transactions", methods=["GET"])
 def get_transactions():
-    global df_global
-    if df_global is None:
+    dataset_id = resolve_dataset_id()
+    df = load_dataset(dataset_id)
+    if df is None:
         return jsonify({"error": "No data available. Please upload a CSV file first."}), 400
     
     try:
-        # Select only required columns for display
-        display_columns = ['id', 'Date', 'Description', 'Amount', 'Category', 'custom_name']
-        available_columns = [col for col in display_columns if col in df_global.columns]
-        
-        data = df_global[available_columns].to_dict(orient='records')
-        return jsonify(data)
+        return transactions_response(filter_transactions(df))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Error retrieving transactions: {str(e)}"}), 500
 
 @app.route("/api/get_other_transactions", methods=["GET"])
 def get_other_transactions():
-    global df_global
-    if df_global is None:
+    dataset_id = resolve_dataset_id()
+    df = load_dataset(dataset_id)
+    if df is None:
         return jsonify({"error": "No data available"}), 400
     
     try:
-        other_txns = df_global[df_global['Category'] == 'Other']
-        display_columns = ['id', 'Date', 'Description', 'Amount', 'Category', 'custom_name']
-        available_columns = [col for col in display_columns if col in other_txns.columns]
-        
-        if len(other_txns) > 0:
-            pass # Removed debug print
-        
-        data = other_txns[available_columns].to_dict(orient='records')
-        return jsonify(data)
+        other_txns = filter_transactions(df, (df['Category'] == 'Other').to_numpy())
+        return transactions_response(other_txns)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Error retrieving other transactions: {str(e)}"}), 500
 
 @app.route("/api/update_category", methods=["POST"])
+@writes_dataset
 def update_category():
-    global df_global
-    if df_global is None:
+    dataset_id = resolve_dataset_id()
+    df = load_dataset(dataset_id)
+    if df is None:
         return jsonify({"error": "No data available"}), 400
     
     try:
@@ -303,28 +1296,102 @@ def update_category():
             return jsonify({"error": "Custom category name is required for non-predefined categories"}), 400
         
         # Update the category and custom name
-        mask = df_global['id'] == transaction_id
-        
-        if not mask.any():
-            # Debug: Print available IDs
-            available_ids = df_global['id'].tolist()
-            return jsonify({
-                "error": f"Transaction ID {transaction_id} not found. Available IDs: {available_ids[:10]}..."  # Show first 10 IDs
-            }), 404
+        position = find_row(dataset_id, df, transaction_id)
+        
+        if position is None:
+            return transaction_not_found(df, transaction_id)
             
         # Update the category
-        df_global.loc[mask, 'Category'] = new_category
-        df_global.loc[mask, 'custom_name'] = custom_name
+        recategorize_rows(dataset_id, df, [position], [new_category], [custom_name])
+        save_edit(dataset_id, df, [position], [new_category], [custom_name])
         
         return jsonify({"message": "Category updated successfully"}), 200
         
     except Exception as e:
         return jsonify({"error": f"Error updating category: {str(e)}"}), 500
 
+@app.route("/api/update_categories", methods=["POST"])
+@writes_dataset
+def update_categories():
+    """Apply many (id, category, custom_name) changes in one pass and one write"""
+    dataset_id = resolve_dataset_id()
+    df = load_dataset(dataset_id)
+    if df is None:
+        return jsonify({"error": "No data available"}), 400
+    
+    try:
+        data = request.get_json()
+        updates = data.get('updates') if isinstance(data, dict) else data
+        if not isinstance(updates, list) or not updates:
+            return jsonify({"error": "A non-empty 'updates' list is required"}), 400
+        
+        # Validate every item the same way update_category does
+        results = []
+        valid_ids, valid_categories, valid_names, valid_items = [], [], [], []
+        for item in updates:
+            item = item if isinstance(item, dict) else {}
+            transaction_id = item.get('id')
+            new_category = item.get('category')
+            custom_name = item.get('custom_name', '') or ''
+            result = {"id": transaction_id, "status": "error"}
+            results.append(result)
+            
+            if not transaction_id:
+                result["error"] = "Transaction ID is required"
+                continue
+            if not new_category:
+                result["error"] = "Category is required"
+                continue
+            try:
+                transaction_id = int(transaction_id)
+            except (ValueError, TypeError):
+                result["error"] = f"Invalid transaction ID format: {transaction_id}"
+                continue
+            if new_category not in PREDEFINED_CATEGORIES and not custom_name:
+                result["error"] = "Custom category name is required for non-predefined categories"
+                continue
+            
+            valid_ids.append(transaction_id)
+            valid_categories.append(new_category)
+            valid_names.append(custom_name)
+            valid_items.append(result)
+        
+        # Resolve all ids at once; -1 marks ids missing from the dataset
+        positions = id_index(dataset_id, df).get_indexer(valid_ids) if valid_ids else np.array([], dtype=int)
+        found = positions >= 0
+        for result, ok in zip(valid_items, found):
+            if ok:
+                result["status"] = "updated"
+            else:
+                result["error"] = f"Transaction ID {result['id']} not found"
+        
+        updated = int(found.sum())
+        if updated:
+            # Later items win when the same id appears more than once
+            rows = positions[found]
+            last = ~pd.Index(rows).duplicated(keep='last')
+            rows = rows[last]
+            categories = np.asarray(valid_categories, dtype=object)[found][last]
+            custom_names = np.asarray(valid_names, dtype=object)[found][last]
+            recategorize_rows(dataset_id, df, rows, categories, custom_names)
+            save_edit(dataset_id, df, rows, categories, custom_names)
+        
+        return jsonify({
+            "message": f"Updated {updated} of {len(updates)} transactions",
+            "updated": updated,
+            "failed": len(updates) - updated,
+            "results": results
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": f"Error updating categories: {str(e)}"}), 500
+
 @app.route("/api/add_custom_category", methods=["POST"])
+@writes_dataset
 def add_custom_category():
-    global df_global
-    if df_global is None:
+    dataset_id = resolve_dataset_id()
+    df = load_dataset(dataset_id)
+    if df is None:
         return jsonify({"error": "No data available"}), 400
     
     try:
@@ -346,27 +1413,25 @@ def add_custom_category():
             return jsonify({"error": f"Invalid transaction ID format: {transaction_id}"}), 400
         
         # Update the specific transaction
-        mask = df_global['id'] == transaction_id
-        
-        if not mask.any():
-            # Debug: Print available IDs
-            available_ids = df_global['id'].tolist()
-            return jsonify({
-                "error": f"Transaction ID {transaction_id} not found. Available IDs: {available_ids[:10]}..."  # Show first 10 IDs
-            }), 404
-            
-        df_global.loc[mask, 'Category'] = custom_category
-        df_global.loc[mask, 'custom_name'] = custom_category
+        position = find_row(dataset_id, df, transaction_id)
         
+        if position is None:
+            return transaction_not_found(df, transaction_id)
+            
         # If keywords provided, update other transactions with similar descriptions
-        affected_count = 1  # At least the selected transaction
-        if description_keywords:
-            for keyword in description_keywords:
-                if keyword.strip():
-                    keyword_mask = df_global['Description'].str.contains(keyword.strip(), case=False, na=False)
-                    df_global.loc[keyword_mask, 'Category'] = custom_category
-                    df_global.loc[keyword_mask, 'custom_name'] = custom_category
-                    affected_count = df_global[df_global['Category'] == custom_category].shape[0]
+        # in one pass and keep the rule for future uploads
+        keywords = [k.strip() for k in description_keywords if isinstance(k, str) and k.strip()]
+        matched = np.zeros(len(df), dtype=bool)
+        if keywords:
+            rule = {'category': custom_category, 'keywords': keywords}
+            matched = pd.notna(match_keyword_rules(df['Description'], [rule]))
+            save_keyword_rule(dataset_id, custom_category, keywords)
+        matched[position] = True  # At least the selected transaction
+        
+        rows = np.flatnonzero(matched)
+        recategorize_rows(dataset_id, df, rows, custom_category, custom_category)
+        affected_count = len(rows)
+        save_edit(dataset_id, df, rows, custom_category, custom_category)
         
         return jsonify({
             "message": f"Custom category '{custom_category}' added successfully",
@@ -378,64 +1443,49 @@ def add_custom_category():
 
 @app.route("/api/get_expense_summary", methods=["GET"])
 def get_expense_summary():
-    """Get expense-only summary for charts"""
-    global df_global
-    if df_global is None:
+    """Get expense-only summary for charts, optionally for a from/to date window"""
+    dataset_id = resolve_dataset_id()
+    df = load_dataset(dataset_id)
+    if df is None:
         return jsonify({"error": "No data available"}), 400
     
     try:
-        # Create summary with expenses only (negative amounts)
-        expenses = df_global[df_global['Amount'] < 0].copy()
-        
-        if expenses.empty:
+        # Served from the running per-category aggregates instead of rescanning expenses;
+        # a from/to window aggregates just the rows it covers
+        if request.args.get('from') or request.args.get('to'):
+            aggregates = category_aggregates(df.iloc[date_window(df)])
+        else:
+            aggregates = dataset_aggregates(dataset_id, df)
+        if not aggregates['expense_count']:
             return jsonify({"error": "No expense data found"}), 400
         
-        expenses['Amount'] = expenses['Amount'].abs()
-        
-        # Create display category (use custom_name if available, otherwise use Category)
-        expenses['Display_Category'] = expenses.apply(
-            lambda row: row['custom_name'] if row['custom_name'] else row['Category'],
-            axis=1
-        )
-        
-        # Get all unique categories to ensure all are represented
-        all_categories = expenses['Display_Category'].unique()
-        
-        # Group by display category and sum amounts
-        summary = expenses.groupby('Display_Category').agg({
-            'Amount': 'sum',
-            'id': 'count'
-        }).reset_index()
-        summary.columns = ['Category', 'Amount', 'Transaction_Count']
-        
-        # Ensure all categories are included (even if sum is 0)
-        missing_categories = set(all_categories) - set(summary['Category'])
-        for cat in missing_categories:
-            new_row = pd.DataFrame({
-                'Category': [cat],
-                'Amount': [0],
-                'Transaction_Count': [0]
-            })
-            summary = pd.concat([summary, new_row], ignore_index=True)
-            
+        categories = list(aggregates['expense_count'])
+        summary = pd.DataFrame({
+            'Category': categories,
+            'Amount': [aggregates['expense_amount'][c] / 100 for c in categories],
+            'Transaction_Count': [aggregates['expense_count'][c] for c in categories]
+        })
         summary = summary.sort_values('Amount', ascending=False)
         summary['Amount'] = summary['Amount'].round(2)
         
-        return jsonify(summary.to_dict(orient='records'))
+        return frame_response(summary)
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": f"Error creating expense summary: {str(e)}"}), 500
     
 @app.route("/api/get_all_categories", methods=["GET"])
 def get_all_categories():
-    global df_global
-    if df_global is None:
+    dataset_id = resolve_dataset_id()
+    df = load_dataset(dataset_id)
+    if df is None:
         return jsonify({"error": "No data available"}), 400
     
     try:
         # Get all unique categories including custom ones
-        all_categories = df_global['Category'].unique().tolist()
-        custom_categories = df_global[df_global['custom_name'] != '']['custom_name'].unique().tolist()
+        all_categories = df['Category'].unique().tolist()
+        custom_categories = df[df['custom_name'] != '']['custom_name'].unique().tolist()
         
         # Combine and deduplicate
         all_categories = list(set(all_categories + custom_categories))
@@ -449,6 +1499,48 @@ def get_all_categories():
     except Exception as e:
         return jsonify({"error": f"Error retrieving categories: {str(e)}"}), 500
 
+@app.route("/api/datasets", methods=["GET"])
+def get_datasets():
+    """Memory used by the datasets resident in this process.
+    
+    Only totals are reported: a dataset id is the sole key to its data, so
+    the ids of other clients' datasets must not be listed.
+    """
+    with _datasets_lock:
+        entries = list(_datasets.values())
+    return jsonify({
+        "memory_budget_mb": round(MEMORY_BUDGET_BYTES / 1024 / 1024, 2),
+        "memory_used_mb": round(sum(entry['nbytes'] for entry in entries) / 1024 / 1024, 2),
+        "resident_datasets": len(entries),
+        "resident_rows": sum(len(entry['df']) for entry in entries)
+    }), 200
+
+@app.route("/api/datasets/<dataset_id>/memory", methods=["GET"])
+def get_dataset_memory(dataset_id):
+    """Memory footprint of a dataset's compact layout, column by column"""
+    if not DATASET_ID_PATTERN.match(dataset_id):
+        return jsonify({"error": f"Invalid dataset ID: {dataset_id}"}), 400
+    df = load_dataset(dataset_id)
+    if df is None:
+        return jsonify({"error": "No data available"}), 400
+    return jsonify({"dataset_id": dataset_id, **memory_report(df)}), 200
+
+@app.route("/api/categorization_cache", methods=["GET"])
+def get_categorization_cache():
+    """Hit/miss counters of the narration categorization cache"""
+    with _category_cache_lock:
+        hits = category_cache_stats['hits']
+        misses = category_cache_stats['misses']
+        size = len(_category_cache)
+    lookups = hits + misses
+    return jsonify({
+        "size": size,
+        "max_size": CATEGORY_CACHE_SIZE,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+    }), 200
+
 # Remove unnecessary endpoints - keep only the essential ones
 # Remove: get_budget_status, get_spending_alerts, get_spending_trends, get_recurring_expenses, get_savings_goals, get_financial_insights
 
@@ -0,0 +1,134 @@
+"""Regression benchmark for the expense-summary pipelines.
+
+Compares the original row-wise summaries (``apply(axis=1)`` plus the
+per-category ``pd.concat`` loop) with the column-wise ``category_aggregates``
+of app_backup.py and streamlit_app_backup.py on synthetic statements, checks
+that both produce the same summary and prints the speedup.
+
+    python bench_expense_summary.py                      # 10k, 1M and 10M rows
+    python bench_expense_summary.py --sizes 10000,100000
+"""
+import argparse
+import ast
+import time
+
+import numpy as np
+import pandas as pd
+
+import app_backup
+
+CATEGORIES = app_backup.PREDEFINED_CATEGORIES
+CUSTOM_NAMES = ['', '', '', '', '', '', '', '', 'Pets', 'Family']
+
+
+def load_streamlit_function(name, helpers=(), path='streamlit_app_backup.py'):
+    """Load one backend function (and the helpers it calls) from the Streamlit script without running the page"""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    names = set(helpers) | {name}
+    nodes = [n for n in tree.body if isinstance(n, ast.FunctionDef) and n.name in names]
+    namespace = {'pd': pd, 'np': np}
+    exec(compile(ast.Module(body=nodes, type_ignores=[]), path, 'exec'), namespace)
+    return namespace[name]
+
+
+def make_statement(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    amount = np.round(rng.normal(-500, 2000, rows), 2)
+    return pd.DataFrame({
+        'id': np.arange(1, rows + 1),
+        'Amount': amount,
+        'Withdrawal Amt.': np.where(amount < 0, -amount, 0.0),
+        'Deposit Amt.': np.where(amount > 0, amount, 0.0),
+        'Category': rng.choice(CATEGORIES, rows).astype(object),
+        'custom_name': rng.choice(CUSTOM_NAMES, rows).astype(object),
+    })
+
+
+def legacy_flask_summary(df):
+    """get_expense_summary as it was before the summary was vectorized"""
+    expenses = df[df['Amount'] < 0].copy()
+    expenses['Amount'] = expenses['Amount'].abs()
+    expenses['Display_Category'] = expenses.apply(
+        lambda row: row['custom_name'] if row['custom_name'] else row['Category'],
+        axis=1
+    )
+    all_categories = expenses['Display_Category'].unique()
+    summary = expenses.groupby('Display_Category').agg({
+        'Amount': 'sum',
+        'id': 'count'
+    }).reset_index()
+    summary.columns = ['Category', 'Amount', 'Transaction_Count']
+    missing_categories = set(all_categories) - set(summary['Category'])
+    for cat in missing_categories:
+        new_row = pd.DataFrame({
+            'Category': [cat],
+            'Amount': [0],
+            'Transaction_Count': [0]
+        })
+        summary = pd.concat([summary, new_row], ignore_index=True)
+    summary = summary.sort_values('Amount', ascending=False)
+    summary['Amount'] = summary['Amount'].round(2)
+    return summary
+
+
+def legacy_streamlit_summary(df):
+    """backend_get_expense_summary_df as it was before the summary was vectorized"""
+    income_like = {'Investment'}
+    expenses = df[(df['Withdrawal Amt.'] > 0) | (df['Amount'] < 0) | ((df['Amount'] > 0) & (~df['Category'].isin(income_like)))].copy()
+    expenses['Amount'] = expenses.apply(
+        lambda r: r['Withdrawal Amt.'] if r['Withdrawal Amt.'] > 0 else abs(r['Amount']), axis=1)
+    expenses['Display_Category'] = expenses.apply(lambda r: r['custom_name'] if str(r.get('custom_name', '')).strip() else r['Category'], axis=1)
+    summary = expenses.groupby('Display_Category').agg(Amount=('Amount', 'sum'), Transaction_Count=('id', 'count')).reset_index()
+    summary.rename(columns={'Display_Category': 'Category'}, inplace=True)
+    return summary.sort_values('Amount', ascending=False)
+
+
+def summary_from_aggregates(aggregates):
+    categories = list(aggregates['expense_count'])
+    return pd.DataFrame({
+        'Category': categories,
+        'Amount': [aggregates['expense_amount'][c] / 100 for c in categories],  # aggregates hold paise
+        'Transaction_Count': [aggregates['expense_count'][c] for c in categories]
+    })
+
+
+def same_summary(a, b):
+    a = a.sort_values('Category').reset_index(drop=True)
+    b = b.sort_values('Category').reset_index(drop=True)
+    return (a['Category'].tolist() == b['Category'].tolist()
+            and (a['Transaction_Count'].to_numpy() == b['Transaction_Count'].to_numpy()).all()
+            and np.allclose(a['Amount'].round(2), b['Amount'].round(2)))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10000,1000000,10000000',
+                        help='comma-separated row counts (default: %(default)s)')
+    args = parser.parse_args()
+
+    pipelines = [
+        ('flask', legacy_flask_summary, app_backup.category_aggregates),
+        ('streamlit', legacy_streamlit_summary, load_streamlit_function('category_aggregates', helpers=('to_amount', 'to_paise', 'amount_paise'))),
+    ]
+
+    print(f"{'pipeline':<10} {'rows':>10} {'row-wise (s)':>13} {'column-wise (s)':>16} {'speedup':>8}  same")
+    for rows in (int(s) for s in args.sizes.split(',')):
+        df = make_statement(rows)
+        ingested = df.assign(Amount=app_backup.to_paise(df['Amount']).astype('int64'))  # the apps keep Amount in paise
+        for name, legacy, vectorized in pipelines:
+            expected, legacy_seconds = timed(legacy, df)
+            aggregates, new_seconds = timed(vectorized, ingested)
+            same = same_summary(expected, summary_from_aggregates(aggregates))
+            print(f"{name:<10} {rows:>10,} {legacy_seconds:>13.3f} {new_seconds:>16.3f} "
+                  f"{legacy_seconds / new_seconds:>7.1f}x  {same}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,7 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
-import matplotlib.pyplot as plt
 import re
 from io import BytesIO
 from datetime import datetime
@@ -13,7 +13,22 @@ from reportlab.platypus import Paragraph, Frame, Spacer, Image as RLImage, Table
 from reportlab.lib import colors
 import matplotlib 
 matplotlib.use("Agg")  # headless backend
+from matplotlib.figure import Figure
 import base64
+import copy
+import csv
+import hashlib
+import threading
+import os
+import uuid
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Copy-on-write: snapshots handed to readers share memory with df_global and any write copies only what it touches
+pd.set_option("mode.copy_on_write", True)
 
 # ==============================================================================
 # BACKEND LOGIC
@@ -24,136 +39,746 @@ if "df_global" not in st.session_state:
     st.session_state.df_global = None
 if 'data_updated' not in st.session_state:
     st.session_state.data_updated = False
+if 'id_index' not in st.session_state:
+    st.session_state.id_index = None
+if 'aggregates' not in st.session_state:
+    st.session_state.aggregates = None  # running per-category totals of df_global, see category_aggregates
+if 'keyword_rules' not in st.session_state:
+    st.session_state.keyword_rules = []  # custom keyword rules, oldest first, re-applied on every upload
+if 'dataset_version' not in st.session_state:
+    st.session_state.dataset_version = 0  # bumped whenever df_global is replaced, see backend_commit_df
+if 'analytics_cache' not in st.session_state:
+    st.session_state.analytics_cache = {"entries": OrderedDict(), "hits": 0, "misses": 0}  # see cached_analytics
+if 'pdf_jobs' not in st.session_state:
+    st.session_state.pdf_jobs = OrderedDict()  # job id -> background PDF build, see backend_submit_pdf_job
+if 'fingerprints' not in st.session_state:
+    st.session_state.fingerprints = None  # (dataset_version, hash index of df_global's rows), see backend_get_fingerprints
+if 'rollup' not in st.session_state:
+    st.session_state.rollup = None  # day x category x merchant sums of df_global, see build_rollup
+if 'view' not in st.session_state:
+    st.session_state.view = None  # (dataset_version, rupee view of the compact df_global), see backend_get_transactions_df
+
+
+COMMON_MERCHANTS = ['AMAZON', 'FLIPKART', 'SWIGGY', 'ZOMATO', 'MYNTRA', 'RELIANCE', 'UBER', 'OLA', 'NETFLIX']
+UPI_PAYEE_PATTERN = r'UPI-([^/-]+)'
 
 
 def extract_name(narration):
     narration_str = str(narration).upper()
-    common_merchants = ['AMAZON', 'FLIPKART', 'SWIGGY', 'ZOMATO', 'MYNTRA', 'RELIANCE', 'UBER', 'OLA', 'NETFLIX']
-    for merchant in common_merchants:
+    for merchant in COMMON_MERCHANTS:
         if merchant in narration_str:
             return merchant
     if "UPI" in narration_str:
-        match = re.search(r'UPI-([^/-]+)', narration_str)
+        match = re.search(UPI_PAYEE_PATTERN, narration_str)
         if match:
             return match.group(1).strip()
     return 'N/A'
 
 
+def extract_names(narrations):
+    # Column-wise extract_name: the first listed merchant contained in the text wins, then the UPI payee, else 'N/A'
+    upper = narrations.astype(str).str.upper()
+    known = np.select([upper.str.contains(m, regex=False).to_numpy() for m in COMMON_MERCHANTS], COMMON_MERCHANTS, default=None)
+    payee = upper.str.extract(UPI_PAYEE_PATTERN, expand=False).str.strip()
+    return pd.Series(known, index=narrations.index).fillna(payee).fillna('N/A')
+
+
+def intern_merchants(names):
+    # Name as a categorical: int codes per row plus one dictionary of merchants (the merchant dimension)
+    return names if isinstance(names.dtype, pd.CategoricalDtype) else names.astype('category')
+
+
+CATEGORY_MAP = {
+    'Groceries': ['GROCERY','SUPERMARKET','FOOD','VEGETABLE','FRUIT','MILK','BREAD','RICE','DAL','OIL','SPICE','KIRANA','GENERAL STORE','BIG BAZAAR','RELIANCE FRESH','DMART','GROFERS','BIGBASKET','RELIANCE MART'],
+    'Utilities': ['ELECTRICITY','POWER','GAS','WATER','INTERNET','PHONE','MOBILE','BROADBAND','WIFI','UTILITY','BILL','PAYMENT','BSNL','AIRTEL','JIO','VODAFONE','IDEA','MTNL'],
+    'Rent': ['RENT','HOUSE RENT','ACCOMMODATION','LEASE','RENTAL'],
+    'Entertainment': ['MOVIE','CINEMA','NETFLIX','AMAZON PRIME','HOTSTAR','ENTERTAINMENT','GAME','GAMING','PLAYSTATION','XBOX','NINTENDO','BOOK','MAGAZINE','NEWSPAPER','MUSIC','SPOTIFY','YOUTUBE','STREAMING'],
+    'Transportation': ['PETROL','DIESEL','FUEL','GAS','UBER','OLA','TAXI','BUS','TRAIN','METRO','PARKING','TOLL','TRANSPORT','CAB','AUTO','PETROL PUMP','HP','SHELL','BP','INDIAN OIL'],
+    'Dining': ['RESTAURANT','CAFE','FOOD','MEAL','LUNCH','DINNER','BREAKFAST','SWIGGY','ZOMATO','FOODPANDA','DOMINOS','PIZZA HUT','KFC','MCDONALDS','SUBWAY','CAFETERIA','CANTEEN','HOTEL','BAR','PUB'],
+    'Shopping': ['AMAZON','FLIPKART','MYNTRA','SHOPPING','PURCHASE','MALL','SHOP','RETAIL','CLOTHING','FASHION','SHOES','ELECTRONICS','APPLIANCES','FURNITURE','DECOR','LIFESTYLE','JABONG','SNAPDEAL','PAYTM MALL','TATA CLIQ','NYKAA','LENSKART'],
+    'Healthcare': ['HOSPITAL','DOCTOR','MEDICAL','PHARMACY','MEDICINE','HEALTH','CLINIC','DENTAL','SURGERY','AMBULANCE','APOLLO','FORTIS','MAX HOSPITAL','MEDPLUS','NETMEDS','PRACTO','HEALTHKART'],
+    'Education': ['SCHOOL','COLLEGE','UNIVERSITY','EDUCATION','TUITION','FEES','COURSE','TRAINING','BOOKS','LIBRARY','EXAM','BYJU','UNACADEMY','VEDANTU','STUDENT','ACADEMIC'],
+    'Insurance': ['INSURANCE','POLICY','PREMIUM','LIC','HDFC LIFE','ICICI PRU','SBI LIFE','BAJAJ ALLIANZ','TATA AIG','RELIANCE GENERAL','HEALTH INSURANCE','MOTOR INSURANCE','TERM INSURANCE'],
+    'Investment': ['MUTUAL FUND','SIP','INVESTMENT','TRADING','ZERODHA','GROWW','ANGEL BROKING','UPSTOX','PAYTM MONEY','KUVERA','STOCK','EQUITY','BOND','FD','RD','PPF','ELSS','NSE','BSE'],
+    'Travel': ['IRCTC','MAKEMYTRIP','GOIBIBO','CLEARTRIP','YATRA','TRAVEL','BOOKING','HOTEL','FLIGHT','TRAIN','BUS','TICKET','VACATION','HOLIDAY','TOURISM','AIRBNB','OYO','TREEBO','REDBUS'],
+    'Personal Care': ['SALON','PARLOUR','BEAUTY','COSMETICS','SKINCARE','HAIRCUT','MASSAGE','SPA','WELLNESS','FITNESS','GYM','YOGA','PERSONAL CARE','GROOMING','URBAN COMPANY','LAKME'],
+    'Home & Garden': ['HOME DEPOT','GARDEN','PLANTS','NURSERY','HARDWARE','TOOLS','REPAIR','MAINTENANCE','PLUMBER','ELECTRICIAN','CARPENTER','PAINT','TILES','CEMENT','CONSTRUCTION','RENOVATION'],
+}
+# Dict order is the category priority; each category compiles to one alternation
+CATEGORY_PATTERNS = [(cat, re.compile('|'.join(re.escape(k) for k in keywords))) for cat, keywords in CATEGORY_MAP.items()]
+
+
 def categorize_transaction(description):
     description = str(description).upper()
-    category_map = {
-        'Groceries': ['GROCERY','SUPERMARKET','FOOD','VEGETABLE','FRUIT','MILK','BREAD','RICE','DAL','OIL','SPICE','KIRANA','GENERAL STORE','BIG BAZAAR','RELIANCE FRESH','DMART','GROFERS','BIGBASKET','RELIANCE MART'],
-        'Utilities': ['ELECTRICITY','POWER','GAS','WATER','INTERNET','PHONE','MOBILE','BROADBAND','WIFI','UTILITY','BILL','PAYMENT','BSNL','AIRTEL','JIO','VODAFONE','IDEA','MTNL'],
-        'Rent': ['RENT','HOUSE RENT','ACCOMMODATION','LEASE','RENTAL'],
-        'Entertainment': ['MOVIE','CINEMA','NETFLIX','AMAZON PRIME','HOTSTAR','ENTERTAINMENT','GAME','GAMING','PLAYSTATION','XBOX','NINTENDO','BOOK','MAGAZINE','NEWSPAPER','MUSIC','SPOTIFY','YOUTUBE','STREAMING'],
-        'Transportation': ['PETROL','DIESEL','FUEL','GAS','UBER','OLA','TAXI','BUS','TRAIN','METRO','PARKING','TOLL','TRANSPORT','CAB','AUTO','PETROL PUMP','HP','SHELL','BP','INDIAN OIL'],
-        'Dining': ['RESTAURANT','CAFE','FOOD','MEAL','LUNCH','DINNER','BREAKFAST','SWIGGY','ZOMATO','FOODPANDA','DOMINOS','PIZZA HUT','KFC','MCDONALDS','SUBWAY','CAFETERIA','CANTEEN','HOTEL','BAR','PUB'],
-        'Shopping': ['AMAZON','FLIPKART','MYNTRA','SHOPPING','PURCHASE','MALL','SHOP','RETAIL','CLOTHING','FASHION','SHOES','ELECTRONICS','APPLIANCES','FURNITURE','DECOR','LIFESTYLE','JABONG','SNAPDEAL','PAYTM MALL','TATA CLIQ','NYKAA','LENSKART'],
-        'Healthcare': ['HOSPITAL','DOCTOR','MEDICAL','PHARMACY','MEDICINE','HEALTH','CLINIC','DENTAL','SURGERY','AMBULANCE','APOLLO','FORTIS','MAX HOSPITAL','MEDPLUS','NETMEDS','PRACTO','HEALTHKART'],
-        'Education': ['SCHOOL','COLLEGE','UNIVERSITY','EDUCATION','TUITION','FEES','COURSE','TRAINING','BOOKS','LIBRARY','EXAM','BYJU','UNACADEMY','VEDANTU','STUDENT','ACADEMIC'],
-        'Insurance': ['INSURANCE','POLICY','PREMIUM','LIC','HDFC LIFE','ICICI PRU','SBI LIFE','BAJAJ ALLIANZ','TATA AIG','RELIANCE GENERAL','HEALTH INSURANCE','MOTOR INSURANCE','TERM INSURANCE'],
-        'Investment': ['MUTUAL FUND','SIP','INVESTMENT','TRADING','ZERODHA','GROWW','ANGEL BROKING','UPSTOX','PAYTM MONEY','KUVERA','STOCK','EQUITY','BOND','FD','RD','PPF','ELSS','NSE','BSE'],
-        'Travel': ['IRCTC','MAKEMYTRIP','GOIBIBO','CLEARTRIP','YATRA','TRAVEL','BOOKING','HOTEL','FLIGHT','TRAIN','BUS','TICKET','VACATION','HOLIDAY','TOURISM','AIRBNB','OYO','TREEBO','REDBUS'],
-        'Personal Care': ['SALON','PARLOUR','BEAUTY','COSMETICS','SKINCARE','HAIRCUT','MASSAGE','SPA','WELLNESS','FITNESS','GYM','YOGA','PERSONAL CARE','GROOMING','URBAN COMPANY','LAKME'],
-        'Home & Garden': ['HOME DEPOT','GARDEN','PLANTS','NURSERY','HARDWARE','TOOLS','REPAIR','MAINTENANCE','PLUMBER','ELECTRICIAN','CARPENTER','PAINT','TILES','CEMENT','CONSTRUCTION','RENOVATION'],
-    }
-    for cat, keywords in category_map.items():
-        if any(keyword in description for keyword in keywords):
+    for cat, pattern in CATEGORY_PATTERNS:
+        if pattern.search(description):
             return cat
     return 'Other'
 
 
-def backend_upload_csv(file):
+CATEGORY_LABELS = np.array([cat for cat, _ in CATEGORY_PATTERNS] + ['Other'], dtype=object)
+
+
+def categorize_descriptions(descriptions):
+    # Batch version of categorize_transaction: one pyarrow RE2 scan of the column per category, no Python per row.
+    # Scanning last category first leaves each row with its minimum matching category index (first match wins).
+    upper = pa.array(descriptions.astype(str).str.upper().to_numpy(dtype=object), type=pa.string(), from_pandas=True)
+    best = np.full(len(upper), len(CATEGORY_PATTERNS))
+    for i in range(len(CATEGORY_PATTERNS) - 1, -1, -1):
+        hits = pc.match_substring_regex(upper, CATEGORY_PATTERNS[i][1].pattern)
+        best[pc.fill_null(hits, False).to_numpy(zero_copy_only=False)] = i
+    return pd.Series(CATEGORY_LABELS[best], index=descriptions.index)
+
+
+def compile_keywords(keywords):
+    keywords = [k.strip() for k in keywords if isinstance(k, str) and k.strip()]
+    return re.compile('|'.join(re.escape(k) for k in keywords), re.IGNORECASE) if keywords else None
+
+
+def match_keyword_rules(descriptions, rules):
+    # Custom category per row (None if unmatched); later rules win, so scan newest first over unclaimed rows
+    if isinstance(descriptions.dtype, pd.CategoricalDtype):
+        # match each distinct description once and map back through the codes
+        labels = match_keyword_rules(pd.Series(descriptions.cat.categories), rules)
+        codes = descriptions.cat.codes.to_numpy()
+        return np.where(codes >= 0, np.append(labels, None)[codes], None)
+    values = descriptions.astype(str).to_numpy(dtype=object)
+    labels = np.full(len(values), None, dtype=object)
+    pending = np.arange(len(values))
+    for rule in reversed(rules):
+        pattern = compile_keywords(rule['keywords'])
+        if pattern is None: continue
+        if len(pending) == 0: break
+        hits = np.fromiter((pattern.search(t) is not None for t in values[pending]), dtype=bool, count=len(pending))
+        labels[pending[hits]] = rule['category']
+        pending = pending[~hits]
+    return labels
+
+
+def apply_keyword_rules(df, rules):
+    labels = match_keyword_rules(df['Description'], rules)
+    rows = np.flatnonzero(pd.notna(labels))
+    if len(rows):
+        set_rows(df, rows, 'Category', labels[rows])
+        set_rows(df, rows, 'custom_name', labels[rows])
+    return rows
+
+
+def save_keyword_rule(category, keywords):
+    # Merge into an existing rule for the category and move it last (most recent wins)
+    rules = st.session_state.keyword_rules
+    merged = [k for r in rules if r['category'] == category for k in r['keywords']]
+    merged += [k for k in keywords if k not in merged]
+    st.session_state.keyword_rules = [r for r in rules if r['category'] != category] + [{'category': category, 'keywords': merged}]
+
+
+NARRATION_CACHE_SIZE = 100_000
+
+
+@st.cache_resource
+def _narration_cache():
+    # Process-wide LRU of normalized narration -> (Category, Name), survives reruns and sessions
+    return {"entries": OrderedDict(), "lock": threading.Lock(), "hits": 0, "misses": 0}
+
+
+def categorize_cached(descriptions):
+    cache = _narration_cache()
+    codes, uniques = pd.factorize(descriptions.astype(str).str.upper().str.strip().to_numpy())
+    cats = np.empty(len(uniques), dtype=object)
+    names = np.empty(len(uniques), dtype=object)
+    missing = []
+    with cache["lock"]:
+        for i, key in enumerate(uniques):
+            hit = cache["entries"].get(key)
+            if hit is None:
+                missing.append(i)
+            else:
+                cache["entries"].move_to_end(key)
+                cats[i], names[i] = hit
+        cache["hits"] += len(uniques) - len(missing)
+        cache["misses"] += len(missing)
+    if missing:
+        new_keys = pd.Series(uniques[missing])
+        cats[missing] = categorize_descriptions(new_keys).to_numpy()
+        names[missing] = extract_names(new_keys).to_numpy()
+        with cache["lock"]:
+            for key, cat, name in zip(uniques[missing], cats[missing], names[missing]):
+                cache["entries"][key] = (cat, name)
+            while len(cache["entries"]) > NARRATION_CACHE_SIZE:
+                cache["entries"].popitem(last=False)
+    # Names are interned over the unique narrations, so per-row work is just indexing the merchant codes
+    merchant_codes, merchants = pd.factorize(names)
+    return (pd.Series(cats[codes], index=descriptions.index),
+            pd.Series(pd.Categorical.from_codes(merchant_codes[codes], categories=merchants), index=descriptions.index))
+
+
+def backend_get_cache_stats():
+    cache = _narration_cache()
+    with cache["lock"]:
+        lookups = cache["hits"] + cache["misses"]
+        return {"size": len(cache["entries"]), "max_size": NARRATION_CACHE_SIZE, "hits": cache["hits"],
+                "misses": cache["misses"], "hit_rate": cache["hits"] / lookups if lookups else 0.0}
+
+
+# Layout of the bank statement export; files with this header skip pandas type inference
+BANK_STATEMENT_COLUMNS = ['Date', 'Narration', 'Value Dt', 'Withdrawal Amt.', 'Deposit Amt.', 'Closing Balance']
+BANK_AMOUNT_COLUMNS = ['Withdrawal Amt.', 'Deposit Amt.', 'Closing Balance']
+
+
+def read_bank_statement(data):
+    # Multithreaded pyarrow parse with an explicit string schema; amounts are cast after stripping thousands
+    # separators. None if the header isn't the bank layout or a value doesn't parse (caller falls back to pandas)
+    raw_columns = next(csv.reader([data.split(b'\n', 1)[0].decode('utf-8-sig', errors='replace')]), [])
+    columns = {raw: raw.strip() for raw in raw_columns}
+    if len(columns) != len(raw_columns) or not set(BANK_STATEMENT_COLUMNS) <= set(columns.values()):
+        return None
+    known = {raw: pa.string() for raw, name in columns.items() if name in BANK_STATEMENT_COLUMNS}
     try:
-        if file is None: raise ValueError("No file provided")
-        df = pd.read_csv(file)
-        if df.empty: raise ValueError("The uploaded CSV file is empty")
-        if len(df) > 0 and df.iloc[0].tolist() == df.columns.tolist():
-            df = df.drop(df.index[0]).reset_index(drop=True)
-        df.columns = df.columns.astype(str).str.strip()
-        if 'Withdrawal Amt.' in df.columns and 'Deposit Amt.' in df.columns:
-            df['Withdrawal Amt.'] = pd.to_numeric(df['Withdrawal Amt.'].astype(str).str.replace(',', ''), errors='coerce').fillna(0)
-            df['Deposit Amt.'] = pd.to_numeric(df['Deposit Amt.'].astype(str).str.replace(',', ''), errors='coerce').fillna(0)
-            df['Amount'] = df['Deposit Amt.'] - df['Withdrawal Amt.']
-            df['Description'] = df.get('Narration', 'No description').fillna("No description")
-        elif 'Amount' in df.columns:
-            df['Amount'] = pd.to_numeric(df['Amount'].astype(str).str.replace(',', ''), errors='coerce')
-            df['Description'] = df.get('Description', df.get('Narration', 'No description')).fillna("No description")
-            df['Deposit Amt.'] = df['Amount'].apply(lambda x: x if x > 0 else 0)
-            df['Withdrawal Amt.'] = df['Amount'].apply(lambda x: abs(x) if x < 0 else 0)
+        table = pacsv.read_csv(BytesIO(data), read_options=pacsv.ReadOptions(use_threads=True),
+                               convert_options=pacsv.ConvertOptions(column_types=known, strings_can_be_null=True))
+        for raw, name in columns.items():
+            if name in BANK_AMOUNT_COLUMNS:
+                amounts = pc.cast(pc.replace_substring(table[raw], ',', ''), pa.float64())
+                table = table.set_column(table.schema.get_field_index(raw), raw, amounts)
+    except pa.ArrowInvalid:
+        return None
+    return table.to_pandas()
+
+
+def to_amount(col):
+    # Numeric columns (fast path) pass through; text ones are stripped of thousands separators first
+    if pd.api.types.is_numeric_dtype(col):
+        return col
+    return pd.to_numeric(col.astype(str).str.replace(',', ''), errors='coerce')
+
+
+# Compact layout of df_global: amounts as integer paise, repetitive text as categoricals, derivable columns dropped.
+# Amount and Closing Balance are paise from parse_statement on; Withdrawal/Deposit Amt. stay in rupees
+PAISE_COLUMNS = ['Amount', 'Closing Balance']
+CATEGORICAL_MAX_UNIQUE_RATIO = 0.5
+
+
+def to_paise(col):
+    # Rupee amount column -> nullable integer paise
+    return (to_amount(col).astype('float64') * 100).round().astype('Int64')
+
+
+def amount_paise(df):
+    # Amount as an int64 paise array (missing as 0); rupee views from expand_transactions carry attrs['rupees']
+    if df.attrs.get('rupees'):
+        return to_paise(df['Amount']).to_numpy(dtype='int64', na_value=0)
+    return df['Amount'].to_numpy(dtype='int64', na_value=0)
+
+
+def compact_transactions(df):
+    # In place; Withdrawal/Deposit Amt. are the two sides of Amount and Narration is copied into Description
+    if df.attrs.get('compact'):
+        return df
+    if df.attrs.pop('rupees', False):
+        for col in PAISE_COLUMNS:
+            if col in df.columns:
+                df[col] = to_paise(df[col])
+    redundant = [c for c in df.columns if str(c).startswith('Unnamed:') and df[c].isna().all()]
+    if 'Narration' in df.columns and (df['Narration'].fillna('No description').astype(str).to_numpy() == df['Description'].astype(str).to_numpy()).all():
+        redundant.append('Narration')
+    if 'Withdrawal Amt.' in df.columns and 'Deposit Amt.' in df.columns:
+        withdrawal, deposit = to_paise(df['Withdrawal Amt.']), to_paise(df['Deposit Amt.'])
+        if not ((withdrawal > 0) & (deposit > 0)).any() and (deposit - withdrawal).equals(df['Amount'].astype('Int64')):
+            redundant += ['Withdrawal Amt.', 'Deposit Amt.']
+    df.drop(columns=redundant, inplace=True)
+    for col in PAISE_COLUMNS:
+        if col in df.columns and df[col].dtype != np.int64 and not df[col].hasnans:
+            df[col] = df[col].astype('int64')
+    for col in df.columns:
+        if pd.api.types.is_string_dtype(df[col].dtype) and (col in ('Category', 'custom_name', 'Name') or df[col].nunique() <= CATEGORICAL_MAX_UNIQUE_RATIO * len(df)):
+            df[col] = df[col].astype('category')
+    if 'id' in df.columns and len(df) and df['id'].max() < 2 ** 31:
+        df['id'] = df['id'].astype('int32')
+    df.attrs['compact'] = True
+    return df
+
+
+def expand_transactions(df):
+    # Rupee view of a compact frame for the panels: float amounts plus Withdrawal/Deposit Amt. rebuilt from Amount
+    df = df.copy(deep=False)
+    df.attrs.pop('compact', None)
+    df.attrs['rupees'] = True
+    for col in PAISE_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('float64') / 100
+    if 'Withdrawal Amt.' not in df.columns:
+        df['Withdrawal Amt.'] = (-df['Amount']).clip(lower=0)
+        df['Deposit Amt.'] = df['Amount'].clip(lower=0)
+    return df
+
+
+def set_rows(df, rows, col, values):
+    # Positional write that first adds any new labels to a categorical column
+    if isinstance(df[col].dtype, pd.CategoricalDtype):
+        new = pd.Index(np.atleast_1d(np.asarray(values, dtype=object))).unique().difference(df[col].cat.categories)
+        if len(new):
+            df[col] = df[col].cat.add_categories(new)
+    df.iloc[rows, df.columns.get_loc(col)] = values
+
+
+def backend_get_memory_report():
+    # Bytes held by df_global next to what the expanded (pre-compaction) layout takes
+    df = st.session_state.df_global
+    if df is None: return None
+    compact = int(df.memory_usage(deep=True).sum())
+    view = expand_transactions(df)
+    for col in view.columns:
+        if isinstance(view[col].dtype, pd.CategoricalDtype):
+            view[col] = view[col].astype(object)
+    expanded = int(view.memory_usage(deep=True).sum())
+    return {"rows": len(df), "bytes": compact, "expanded_bytes": expanded, "reduction": 1 - compact / expanded if expanded else 0.0}
+
+
+# Statement date layouts tried in order, day-first before month-first (sample_data.csv is DD-MM-YYYY)
+DATE_FORMATS = ['%d-%m-%Y', '%d/%m/%Y', '%d-%m-%y', '%d/%m/%y', '%d.%m.%Y', '%Y-%m-%d', '%Y/%m/%d',
+                '%d-%b-%Y', '%d %b %Y', '%d-%b-%y', '%d %b %y', '%m/%d/%Y', '%m-%d-%Y', '%Y-%m-%d %H:%M:%S']
+DATE_SAMPLE_SIZE = 1000
+
+
+def detect_date_format(col):
+    # First of DATE_FORMATS parsing every one of the first DATE_SAMPLE_SIZE distinct dates, else None
+    sample = pd.Series(col.dropna().astype(str).str.strip().unique()[:DATE_SAMPLE_SIZE])
+    sample = sample[sample != '']
+    for fmt in DATE_FORMATS if not sample.empty else ():
+        if pd.to_datetime(sample, format=fmt, errors='coerce').notna().all():
+            return fmt
+    return None
+
+
+def parse_dates(col):
+    # Parse a Date column once with the file's detected format (day-first inference if none fits); NaT if unparseable
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return col
+    fmt = detect_date_format(col)
+    text = col.astype(str).str.strip()
+    return pd.to_datetime(text, format=fmt, errors='coerce') if fmt else pd.to_datetime(text, dayfirst=True, errors='coerce')
+
+
+def index_by_date(df):
+    # Sorted by Date (stable) with a DatetimeIndex over it; df_global is kept this way so nothing re-parses or re-sorts
+    if not df['Date'].is_monotonic_increasing:
+        df = df.sort_values('Date', kind='stable', ignore_index=True)
+    df.index = pd.DatetimeIndex(df['Date'].to_numpy())
+    return df
+
+
+def date_range(df, start=None, end=None):
+    # Rows dated start..end (inclusive days) by binary search on the sorted DatetimeIndex: O(log n) plus the slice
+    lo = df.index.searchsorted(pd.Timestamp(start)) if start is not None else 0
+    hi = df.index.searchsorted(pd.Timestamp(end) + pd.Timedelta(days=1)) if end is not None else len(df)
+    return df.iloc[lo:max(lo, hi)]
+
+
+def categorize_statement(df, rules=()):
+    # Category and merchant Name through the narration cache, blank custom_name, then the saved keyword rules; in place
+    df['Category'], df['Name'] = categorize_cached(df['Description'])
+    df['custom_name'] = ''
+    if rules:
+        apply_keyword_rules(df, rules)
+    return df
+
+
+def parse_statement(data, rules=(), categorize=True):
+    # Raw CSV bytes -> cleaned frame without ids, categorized unless categorize=False; without categorization it
+    # touches no shared state, so it can run on worker threads
+    df = read_bank_statement(data)
+    if df is None:
+        df = pd.read_csv(BytesIO(data))
+    if df.empty: raise ValueError("The uploaded CSV file is empty")
+    if len(df) > 0 and df.iloc[0].tolist() == df.columns.tolist():
+        df = df.drop(df.index[0]).reset_index(drop=True)
+    df.columns = df.columns.astype(str).str.strip()
+    if 'Withdrawal Amt.' in df.columns and 'Deposit Amt.' in df.columns:
+        df['Withdrawal Amt.'] = to_amount(df['Withdrawal Amt.']).fillna(0)
+        df['Deposit Amt.'] = to_amount(df['Deposit Amt.']).fillna(0)
+        df['Amount'] = df['Deposit Amt.'] - df['Withdrawal Amt.']
+        df['Description'] = df.get('Narration', 'No description').fillna("No description")
+    elif 'Amount' in df.columns:
+        df['Amount'] = to_amount(df['Amount'])
+        df['Description'] = df.get('Description', df.get('Narration', 'No description')).fillna("No description")
+        df['Deposit Amt.'] = df['Amount'].apply(lambda x: x if x > 0 else 0)
+        df['Withdrawal Amt.'] = df['Amount'].apply(lambda x: abs(x) if x < 0 else 0)
+    else:
+        raise ValueError("CSV must contain 'Amount' or ('Withdrawal Amt.' & 'Deposit Amt.') columns")
+    if 'Date' not in df.columns: raise ValueError("CSV must contain a 'Date' column")
+    df['Date'] = parse_dates(df['Date'])
+    for col in PAISE_COLUMNS:
+        if col in df.columns:
+            df[col] = to_paise(df[col])
+    df = df.dropna(subset=['Date','Amount'])
+    return categorize_statement(df, rules) if categorize else df
+
+
+# Columns that identify a transaction across overlapping statements
+FINGERPRINT_COLUMNS = ['Date', 'Description', 'Amount', 'Closing Balance']
+
+
+def transaction_fingerprints(df):
+    # 64-bit hash per row over normalized date, narration, amount and closing balance (as paise, so a
+    # compact frame and a freshly parsed one agree); Withdrawal/Deposit Amt. only restate Amount
+    key = pd.DataFrame(index=pd.RangeIndex(len(df)))
+    for col in FINGERPRINT_COLUMNS:
+        if col in df.columns:
+            key[col] = (df[col].astype(str).str.strip() if col in ('Date', 'Description') else df[col].astype('Int64')).to_numpy()
+    return pd.util.hash_pandas_object(key, index=False).to_numpy()
+
+
+def backend_get_fingerprints():
+    # Hash index of df_global's fingerprints, rebuilt only when the dataset version changes
+    cached = st.session_state.fingerprints
+    if cached is None or cached[0] != st.session_state.dataset_version:
+        cached = st.session_state.fingerprints = (st.session_state.dataset_version, pd.Index(transaction_fingerprints(st.session_state.df_global)))
+    return cached[1]
+
+
+def drop_duplicate_transactions(df, known=None, sources=None):
+    # Drop rows already in `known` or repeated from another file (`sources`: file number per row); returns
+    # (rows kept, dropped count). A closing balance identifies a row, so its repeats go even within one file;
+    # without one, identical rows of a file are real repeat payments and the n-th copy is dropped only if
+    # `known` or an earlier file already has n copies. Hash lookups, O(n)
+    fps = transaction_fingerprints(df)
+    sources = np.zeros(len(df), dtype=np.int64) if sources is None else np.asarray(sources)
+    occurrence = pd.Series(fps).groupby([fps, sources]).cumcount().to_numpy(copy=True)
+    if 'Closing Balance' in df.columns:
+        occurrence[df['Closing Balance'].notna().to_numpy()] = 0
+    dup = pd.MultiIndex.from_arrays([fps, occurrence]).duplicated(keep='first')
+    if known is not None and len(known):
+        dup |= occurrence < known.value_counts().reindex(fps, fill_value=0).to_numpy()
+    return (df[~dup].reset_index(drop=True) if dup.any() else df), int(dup.sum())
+
+
+def _load_dataset(df, append=False, sources=None):
+    # Dedupe, assign ids in date order and publish; appended rows are merged into the date order. Returns (added, dropped)
+    existing = st.session_state.df_global if append else None
+    df, dropped = drop_duplicate_transactions(df, backend_get_fingerprints() if existing is not None else None, sources)
+    df = index_by_date(df)
+    first_id = int(existing['id'].max()) + 1 if existing is not None and len(existing) else 1
+    df['id'] = range(first_id, first_id + len(df))
+    added = len(df)
+    compact_transactions(df)
+    if existing is not None:
+        st.session_state.aggregates = merge_aggregates(copy.deepcopy(backend_get_aggregates()), category_aggregates(df))
+        st.session_state.rollup = merge_rollup(backend_get_rollup(), build_rollup(df))
+        if added:
+            df = index_by_date(pd.concat([existing, df], ignore_index=True))
+            df.attrs.pop('compact', None)  # categoricals with different categories concat to plain strings
+            compact_transactions(df)
         else:
-            raise ValueError("CSV must contain 'Amount' or ('Withdrawal Amt.' & 'Deposit Amt.') columns")
-        if 'Date' not in df.columns: raise ValueError("CSV must contain a 'Date' column")
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-        df['Category'] = df['Description'].apply(categorize_transaction)
-        df['Name'] = df['Description'].apply(extract_name)
-        df['custom_name'] = ''
-        df = df.dropna(subset=['Date','Amount'])
-        df['id'] = range(1, len(df) + 1)
-        st.session_state.df_global = df
-        return {"message": "File processed successfully", "total_transactions": len(df)}
+            df = existing
+    else:
+        st.session_state.aggregates = category_aggregates(df)
+        st.session_state.rollup = build_rollup(df)
+    df['Name'] = intern_merchants(df['Name'])  # concat of differently-interned frames falls back to strings
+    st.session_state.id_index = pd.Index(df['id'])
+    backend_commit_df(df)
+    return added, dropped
+
+
+def backend_upload_csv(file, append=False):
+    try:
+        if file is None: raise ValueError("No file provided")
+        df = parse_statement(file.read(), st.session_state.keyword_rules)
+        added, dropped = _load_dataset(df, append)
+        return {"message": "File processed successfully", "total_transactions": len(st.session_state.df_global),
+                "added": added, "duplicates_dropped": dropped}
     except Exception as e:
         raise ValueError(f"Error processing file: {str(e)}")
 
 
+INGEST_WORKERS = min(8, os.cpu_count() or 1)
+
+
+@st.cache_resource
+def _ingest_executor():
+    # Threads rather than processes: functions defined in a Streamlit script can't be pickled into a process pool.
+    # Threads only overlap the parsing (pyarrow's multithreaded CSV reader and the pandas C parser release the GIL);
+    # categorization is a Python-level regex pass that holds the GIL, so it does not run on them (see backend_upload_csvs)
+    return ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="ingest")
+
+
+def backend_upload_csvs(files, append=False):
+    # Parse several statements on the ingest threads (each with its own date format), then categorize their union in one
+    # pass here, where narrations shared between files are looked up once in the cache, and load it deduplicated
+    files = [f for f in files if f is not None]
+    if not files: raise ValueError("No file provided")
+    futures = [_ingest_executor().submit(parse_statement, f.read(), categorize=False) for f in files]
+    frames = []
+    for f, future in zip(files, futures):
+        try:
+            frames.append(future.result())
+        except Exception as e:
+            raise ValueError(f"Error processing file {getattr(f, 'name', '')}: {str(e)}")
+    df = categorize_statement(pd.concat(frames, ignore_index=True), list(st.session_state.keyword_rules))
+    added, dropped = _load_dataset(df, append, np.repeat(np.arange(len(frames)), [len(part) for part in frames]))
+    return {"message": f"{len(files)} files processed successfully", "total_transactions": len(st.session_state.df_global),
+            "added": added, "duplicates_dropped": dropped,
+            "files": [{"name": getattr(f, 'name', ''), "transactions": len(part)} for f, part in zip(files, frames)]}
+
+
 def backend_get_transactions_df():
-    return st.session_state.df_global.copy() if st.session_state.df_global is not None else pd.DataFrame()
+    # Read-only snapshot in rupees: expand_transactions of df_global, built once per dataset version and handed
+    # out as shallow copies; under copy-on-write a reader's writes land in its own copy
+    if st.session_state.df_global is None:
+        return pd.DataFrame()
+    view = st.session_state.view
+    if view is None or view[0] != st.session_state.dataset_version:
+        view = st.session_state.view = (st.session_state.dataset_version, expand_transactions(st.session_state.df_global))
+    return view[1].copy(deep=False)
+
+
+def _writable_df():
+    # Compact snapshot of df_global for writers, published back through backend_commit_df
+    return st.session_state.df_global.copy(deep=False) if st.session_state.df_global is not None else pd.DataFrame()
+
+
+def backend_get_dataset_version():
+    return st.session_state.dataset_version
+
+
+def backend_commit_df(df):
+    # Writers edit their own snapshot (copy-on-write copies only the touched columns) and publish it here
+    st.session_state.df_global = df
+    st.session_state.dataset_version += 1
 
 
 def backend_get_other_df():
     df = backend_get_transactions_df()
-    return df[df['Category'] == 'Other'].copy() if not df.empty else pd.DataFrame()
+    return df[df['Category'] == 'Other'] if not df.empty else pd.DataFrame()
+
+
+def category_aggregates(df):
+    # Expense amount (integer paise)/count per display category (custom_name if set, else Category) and row count per Category
+    counts = df['Category'].value_counts()
+    aggs = {'expense_amount': {}, 'expense_count': {}, 'category_count': counts[counts > 0].to_dict()}
+    # Treat expense as: Withdrawal Amt. > 0 OR (Amount < 0) OR (Amount > 0 and non-income-like)
+    income_like = {'Investment'}  # extend if needed
+    amount = amount_paise(df)
+    mask = (amount < 0) | ((amount > 0) & ~df['Category'].isin(income_like).to_numpy())
+    if 'Withdrawal Amt.' in df.columns:
+        withdrawal = to_paise(df['Withdrawal Amt.']).to_numpy(dtype='int64', na_value=0)
+        mask |= withdrawal > 0
+        withdrawal = withdrawal[mask]
+        exp_amount = np.where(withdrawal > 0, withdrawal, np.abs(amount[mask]))
+    else:
+        exp_amount = np.abs(amount[mask])
+    if not mask.any():
+        return aggs
+    cats = df['Category'].to_numpy(dtype=object)[mask]
+    if 'custom_name' in df.columns:
+        custom = df['custom_name'][mask]
+        display = np.where(custom.astype(str).str.strip().ne('').to_numpy(), custom.to_numpy(dtype=object), cats)
+    else:
+        display = cats
+    grouped = pd.Series(exp_amount).groupby(display).agg(['sum', 'count'])
+    aggs['expense_amount'] = grouped['sum'].to_dict()
+    aggs['expense_count'] = grouped['count'].to_dict()
+    return aggs
+
+
+def merge_aggregates(total, delta, sign=1):
+    for key in ('expense_amount', 'expense_count', 'category_count'):
+        for cat, value in delta[key].items():
+            total[key][cat] = total[key].get(cat, 0) + sign * value
+    for cat in [c for c, n in total['expense_count'].items() if n <= 0]:
+        del total['expense_count'][cat], total['expense_amount'][cat]
+    for cat in [c for c, n in total['category_count'].items() if n <= 0]:
+        del total['category_count'][cat]
+    return total
+
+
+def backend_get_aggregates():
+    if st.session_state.aggregates is None and st.session_state.df_global is not None:
+        st.session_state.aggregates = category_aggregates(st.session_state.df_global)
+    return st.session_state.aggregates
+
+
+ROLLUP_MEASURES = ['count', 'expense', 'expense_count', 'income', 'income_count']
+
+
+def build_rollup(df):
+    # Day x Category x merchant (Name) cube: row count, expense and income (integer paise) and their row counts.
+    # The dashboard and build_insights group these sums instead of the raw rows; it has at most one row per
+    # (day, category, merchant), so it is far smaller than the dataset
+    amount = amount_paise(df)
+    merchant = df['Name'] if 'Name' in df.columns else df['Description'].astype(str).str.slice(0, 30)
+    measures = pd.DataFrame({'count': np.ones(len(df), dtype='int64'),
+                             'expense': np.where(amount < 0, -amount, 0), 'expense_count': (amount < 0).astype('int64'),
+                             'income': np.where(amount > 0, amount, 0), 'income_count': (amount > 0).astype('int64')}, index=df.index)
+    cube = measures.groupby([parse_dates(df['Date']).dt.normalize(), df['Category'], merchant], observed=True).sum()
+    # plain (non-categorical) levels so cubes of differently-interned frames align in merge_rollup
+    cube.index = pd.MultiIndex.from_arrays([cube.index.get_level_values(0)] + [cube.index.get_level_values(i).astype(object) for i in (1, 2)],
+                                           names=['Date', 'Category', 'Name'])
+    return cube
+
+
+def merge_rollup(total, delta, sign=1):
+    merged = total.add(sign * delta, fill_value=0)
+    return merged[merged['count'] > 0].astype('int64')
+
+
+def backend_get_rollup():
+    if st.session_state.rollup is None and st.session_state.df_global is not None:
+        st.session_state.rollup = build_rollup(st.session_state.df_global)
+    return st.session_state.rollup
+
+
+def recategorize_rows(df, rows, categories, custom_names):
+    # Edit unique row positions and move their contribution between categories in the running aggregates and the rollup
+    aggs, rollup = backend_get_aggregates(), backend_get_rollup()
+    before, rollup_before = category_aggregates(df.iloc[rows]), build_rollup(df.iloc[rows])
+    set_rows(df, rows, 'Category', categories)
+    set_rows(df, rows, 'custom_name', custom_names)
+    merge_aggregates(aggs, before, -1)
+    merge_aggregates(aggs, category_aggregates(df.iloc[rows]), 1)
+    st.session_state.rollup = merge_rollup(merge_rollup(rollup, rollup_before, -1), build_rollup(df.iloc[rows]))
+
+
+def backend_find_row(df, transaction_id):
+    # id -> row position through the hash index kept alongside df_global (edits never reorder rows)
+    if st.session_state.id_index is None or len(st.session_state.id_index) != len(df):
+        st.session_state.id_index = pd.Index(df['id'])
+    try:
+        return st.session_state.id_index.get_loc(int(transaction_id))
+    except KeyError:
+        raise ValueError(f"Transaction ID {transaction_id} not found.")
 
 
 def backend_update_category(transaction_id, new_category, custom_name=""):
-    df = backend_get_transactions_df()
+    df = _writable_df()
     if df.empty: raise ValueError("No data available")
-    mask = df['id'] == int(transaction_id)
-    if not mask.any(): raise ValueError(f"Transaction ID {transaction_id} not found.")
-    df.loc[mask, 'Category'] = new_category
-    df.loc[mask, 'custom_name'] = custom_name
-    st.session_state.df_global = df
+    pos = backend_find_row(df, transaction_id)
+    recategorize_rows(df, [pos], [new_category], [custom_name])
+    backend_commit_df(df)
     return {"message": "Category updated successfully"}
 
 
+def backend_update_categories(changes):
+    # changes: iterable of dicts with id, category and optional custom_name; applied in one vectorized pass
+    df = _writable_df()
+    if df.empty: raise ValueError("No data available")
+    changes = list(changes)
+    results = [{"id": c.get('id'), "status": "error"} for c in changes]
+    ids, cats, names, valid = [], [], [], []
+    for res, c in zip(results, changes):
+        try:
+            tid = int(c.get('id'))
+        except (ValueError, TypeError):
+            res["error"] = f"Invalid transaction ID format: {c.get('id')}"
+            continue
+        if not c.get('category'):
+            res["error"] = "Category is required"
+            continue
+        ids.append(tid); cats.append(c['category']); names.append(c.get('custom_name', '') or ''); valid.append(res)
+    if st.session_state.id_index is None or len(st.session_state.id_index) != len(df):
+        st.session_state.id_index = pd.Index(df['id'])
+    pos = st.session_state.id_index.get_indexer(ids) if ids else np.array([], dtype=int)
+    found = pos >= 0
+    for res, ok in zip(valid, found):
+        if ok: res["status"] = "updated"
+        else: res["error"] = f"Transaction ID {res['id']} not found."
+    if found.any():
+        rows = pos[found]
+        last = ~pd.Index(rows).duplicated(keep='last')  # later changes to the same id win
+        recategorize_rows(df, rows[last], np.asarray(cats, dtype=object)[found][last], np.asarray(names, dtype=object)[found][last])
+        backend_commit_df(df)
+    return {"message": f"Updated {int(found.sum())} of {len(changes)} transactions", "updated": int(found.sum()), "results": results}
+
+
 def backend_add_custom_category(transaction_id, custom_category, description_keywords=None):
-    df = backend_get_transactions_df()
+    df = _writable_df()
     if df.empty: raise ValueError("No data available")
-    mask = df['id'] == int(transaction_id)
-    if not mask.any(): raise ValueError(f"Transaction ID {transaction_id} not found.")
-    df.loc[mask, 'Category'] = custom_category
-    df.loc[mask, 'custom_name'] = custom_category
-    if description_keywords:
-        for keyword in description_keywords:
-            if keyword:
-                keyword_mask = df['Description'].str.contains(keyword, case=False, na=False)
-                df.loc[keyword_mask, 'Category'] = custom_category
-                df.loc[keyword_mask, 'custom_name'] = custom_category
-    st.session_state.df_global = df
-    return {"message": f"Custom category '{custom_category}' added successfully."}
+    pos = backend_find_row(df, transaction_id)
+    keywords = [k.strip() for k in (description_keywords or []) if isinstance(k, str) and k.strip()]
+    matched = np.zeros(len(df), dtype=bool)
+    if keywords:
+        matched = pd.notna(match_keyword_rules(df['Description'], [{'category': custom_category, 'keywords': keywords}]))
+        save_keyword_rule(custom_category, keywords)
+    matched[pos] = True
+    rows = np.flatnonzero(matched)
+    recategorize_rows(df, rows, custom_category, custom_category)
+    backend_commit_df(df)
+    return {"message": f"Custom category '{custom_category}' added successfully.", "affected_transactions": len(rows)}
 
 
 def backend_get_expense_summary_df():
-    df = backend_get_transactions_df()
-    if df.empty:
+    # Served from the running aggregates: O(categories) instead of a full rescan
+    aggs = backend_get_aggregates()
+    if not aggs or not aggs['expense_count']:
         return pd.DataFrame()
-    # Treat expense as: Withdrawal Amt. > 0 OR (Amount < 0) OR (Amount > 0 and non-income-like)
-    income_like = {'Investment'}  # extend if needed
-    if 'Withdrawal Amt.' in df.columns:
-        expenses = df[(df['Withdrawal Amt.'] > 0) | (df['Amount'] < 0) | ((df['Amount'] > 0) & (~df['Category'].isin(income_like)))].copy()
-        expenses['Amount'] = expenses.apply(
-            lambda r: r['Withdrawal Amt.'] if r['Withdrawal Amt.'] > 0 else abs(r['Amount']), axis=1)
-    else:
-        expenses = df[(df['Amount'] < 0) | ((df['Amount'] > 0) & (~df['Category'].isin(income_like)))].copy()
-        expenses['Amount'] = expenses['Amount'].abs()
-    if expenses.empty:
-        return pd.DataFrame()
-    expenses['Display_Category'] = expenses.apply(lambda r: r['custom_name'] if str(r.get('custom_name','')).strip() else r['Category'], axis=1)
-    summary = expenses.groupby('Display_Category').agg(Amount=('Amount','sum'), Transaction_Count=('id','count')).reset_index()
-    summary.rename(columns={'Display_Category':'Category'}, inplace=True)
+    cats = list(aggs['expense_count'])
+    summary = pd.DataFrame({'Category': cats, 'Amount': [aggs['expense_amount'][c] / 100 for c in cats],
+                            'Transaction_Count': [aggs['expense_count'][c] for c in cats]})
     return summary.sort_values('Amount', ascending=False)
 
-def build_insights(df: pd.DataFrame):
+
+def backend_get_merchants(df=None):
+    # Merchant dimension table: merchant_id (Name's categorical code) -> Name with transaction count and spend,
+    # aggregated with bincount over the integer codes rather than grouping strings
+    df = st.session_state.df_global if df is None else df
+    if df is None or df.empty or 'Name' not in df.columns:
+        return pd.DataFrame(columns=['merchant_id', 'Name', 'Transactions', 'Spend'])
+    names = intern_merchants(df['Name'])
+    codes, n = names.cat.codes.to_numpy(), len(names.cat.categories)
+    amount = amount_paise(df) / 100
+    return pd.DataFrame({'merchant_id': np.arange(n), 'Name': names.cat.categories,
+                         'Transactions': np.bincount(codes, minlength=n),
+                         'Spend': np.bincount(codes, weights=np.where(amount < 0, -amount, 0.0), minlength=n)})
+
+
+def backend_get_other_count():
+    aggs = backend_get_aggregates()
+    return aggs['category_count'].get('Other', 0) if aggs else 0
+
+
+ANALYTICS_CACHE_SIZE = 32
+
+
+def cached_analytics(name, compute, *key):
+    # Per-session LRU of derived results keyed by dataset version: reruns that only change widgets reuse
+    # them, any upload or edit bumps the version so stale entries simply stop being hit and age out
+    cache = st.session_state.analytics_cache
+    key = (name, st.session_state.dataset_version) + key
+    if key in cache["entries"]:
+        cache["hits"] += 1
+        cache["entries"].move_to_end(key)
+        return cache["entries"][key]
+    cache["misses"] += 1
+    value = cache["entries"][key] = compute()
+    while len(cache["entries"]) > ANALYTICS_CACHE_SIZE:
+        cache["entries"].popitem(last=False)
+    return value
+
+
+def backend_get_analytics_cache_stats():
+    cache = st.session_state.analytics_cache
+    lookups = cache["hits"] + cache["misses"]
+    return {"size": len(cache["entries"]), "max_size": ANALYTICS_CACHE_SIZE, "hits": cache["hits"],
+            "misses": cache["misses"], "hit_rate": cache["hits"] / lookups if lookups else 0.0}
+
+def monthly_category_matrix(rollup: pd.DataFrame) -> pd.DataFrame:
+    # Month x Category expense totals regrouped from the rollup; rows are a sorted monthly PeriodIndex, missing cells are 0
+    exp = rollup[rollup["expense_count"] > 0] if not rollup.empty else rollup
+    if exp.empty:
+        return pd.DataFrame(index=pd.PeriodIndex([], freq="M"), dtype=float)
+    keys = [exp.index.get_level_values("Date").to_period("M"), exp.index.get_level_values("Category")]
+    return (exp["expense"].groupby(keys).sum() / 100).unstack(fill_value=0.0).sort_index()
+
+
+def category_changes(matrix: pd.DataFrame) -> pd.DataFrame:
+    # Percent change of every category between each month and the previous one (row i vs row i-1);
+    # a category appearing from nothing counts as +100%, absent in both months as 0%
+    prev, curr = matrix.shift(1).iloc[1:], matrix.iloc[1:]
+    change = ((curr - prev) / prev.where(prev != 0) * 100).round(1)
+    return change.mask(prev == 0, np.where(curr > 0, 100.0, 0.0))
+
+
+def build_insights(df: pd.DataFrame, rollup=None):
+    # Everything is read off the day x category x merchant rollup (built from df unless the caller has it)
     if df.empty:
         return {
             "period": ("N/A", "N/A"),
@@ -165,80 +790,54 @@ def build_insights(df: pd.DataFrame):
             "moM": pd.Series(dtype=float),
             "moM_changes": [],
             "category_spikes": [],
+            "monthly_matrix": monthly_category_matrix(pd.DataFrame()),
+            "category_changes": pd.DataFrame(),
             "category_table": pd.DataFrame(columns=["Category","Amount","Share","Txns"]),
             "top_other_sources": [],
             "advice_lines": []
         }
 
-    dfx = df.copy()
-    dfx["Date"] = pd.to_datetime(dfx["Date"], errors="coerce")
-    dfx = dfx.dropna(subset=["Date"])
-    period = (dfx["Date"].min().date(), dfx["Date"].max().date())
+    rollup = build_rollup(df) if rollup is None else rollup
+    days = rollup.index.get_level_values("Date")
+    period = (days.min().date(), days.max().date())
 
-    total_income = float(dfx[dfx["Amount"] > 0]["Amount"].sum())
-    total_expense = float(dfx[dfx["Amount"] < 0]["Amount"].abs().sum())
-    net_amount = float(dfx["Amount"].sum())
-
-    exp = dfx[dfx["Amount"] < 0].copy()
-    exp["AbsAmount"] = exp["Amount"].abs()
+    total_income = float(rollup["income"].sum() / 100)
+    total_expense = float(rollup["expense"].sum() / 100)
+    net_amount = float((rollup["income"].sum() - rollup["expense"].sum()) / 100)
 
     # Category totals
-    cat_sum = exp.groupby("Category", dropna=False)["AbsAmount"].agg(["sum","count"]).reset_index()
+    by_cat = rollup.groupby(level="Category")[["expense", "expense_count"]].sum()
+    by_cat = by_cat[by_cat["expense_count"] > 0]
+    cat_sum = pd.DataFrame({"Category": by_cat.index, "sum": by_cat["expense"].to_numpy() / 100, "count": by_cat["expense_count"].to_numpy()})
     cat_sum = cat_sum.sort_values("sum", ascending=False)
     total_expense_safe = float(cat_sum["sum"].sum()) if not cat_sum.empty else 0.0
     cat_sum["share"] = (cat_sum["sum"] / total_expense_safe * 100).round(1) if total_expense_safe > 0 else 0.0
     top_categories = cat_sum.head(5)[["Category","sum","share"]].values.tolist()
 
-    # Monthly totals with friendly labels (e.g., "Sep 2023")
-    if not exp.empty:
-        exp["Month"] = exp["Date"].dt.strftime("%b %Y")
-        month_totals = exp.groupby("Month")["AbsAmount"].sum().sort_index(key=lambda x: pd.to_datetime(x, format="%b %Y"))
-        highest_month = (month_totals.idxmax(), float(month_totals.max())) if not month_totals.empty else None
-
-        mom = month_totals.pct_change().dropna().apply(lambda x: round(x*100, 1))
-        moM_changes = list(mom.items())
-
-        category_spikes = []
-        months_sorted = month_totals.index.tolist()
-        if len(months_sorted) >= 2:
-            last_m, prev_m = months_sorted[-1], months_sorted[-2]
-            last_df = exp[exp["Month"] == last_m].groupby("Category")["AbsAmount"].sum()
-            prev_df = exp[exp["Month"] == prev_m].groupby("Category")["AbsAmount"].sum()
-            cats = set(last_df.index) | set(prev_df.index)
-            for c in cats:
-                last_v = float(last_df.get(c, 0.0))
-                prev_v = float(prev_df.get(c, 0.0))
-                if prev_v == 0 and last_v > 0:
-                    change = 100.0
-                elif prev_v == 0 and last_v == 0:
-                    change = 0.0
-                else:
-                    change = round(((last_v - prev_v) / prev_v) * 100, 1)
-                category_spikes.append((c, change, last_v, prev_v))
-            category_spikes.sort(key=lambda x: x[1], reverse=True)
-            category_spikes = category_spikes[:3]
-        else:
-            category_spikes = []
-    else:
-        month_totals = pd.Series(dtype=float)
-        highest_month = None
-        moM_changes = []
-        category_spikes = []
-
-    # Top contributors inside "Other"
+    # Month x category matrix; every monthly insight below is read off it
+    matrix = monthly_category_matrix(rollup)
+    changes = category_changes(matrix)
+    month_totals = matrix.sum(axis=1)
+    month_totals.index = month_totals.index.strftime("%b %Y")  # friendly labels (e.g., "Sep 2023")
+    highest_month = (month_totals.idxmax(), float(month_totals.max())) if not month_totals.empty else None
+
+    mom = month_totals.pct_change().dropna().apply(lambda x: round(x*100, 1))
+    moM_changes = list(mom.items())
+
+    # Biggest category movers between the last two months
+    category_spikes = []
+    if len(matrix) >= 2:
+        last_v, prev_v = matrix.iloc[-1], matrix.iloc[-2]
+        spikes = pd.DataFrame({"change": changes.iloc[-1], "last_v": last_v, "prev_v": prev_v})
+        spikes = spikes[(spikes["last_v"] > 0) | (spikes["prev_v"] > 0)].sort_values("change", ascending=False, kind="stable")
+        category_spikes = [(c, float(ch), float(lv), float(pv)) for c, ch, lv, pv in spikes.head(3).itertuples()]
+
+    # Top contributors (merchants, or short descriptions without a Name column) inside "Other"
     top_other_sources = []
-    if "Other" in cat_sum["Category"].astype(str).values:
-        other_df = exp[exp["Category"] == "Other"].copy()
-        if not other_df.empty:
-            if "Name" in other_df.columns:
-                src = other_df.groupby("Name")["AbsAmount"].sum().sort_values(ascending=False).head(3)
-                top_other_sources = [(k, float(v)) for k, v in src.items()]
-            else:
-                src = (other_df
-                       .assign(DescShort=other_df["Description"].astype(str).str.slice(0,30))
-                       .groupby("DescShort")["AbsAmount"].sum()
-                       .sort_values(ascending=False).head(3))
-                top_other_sources = [(k, float(v)) for k, v in src.items()]
+    other = rollup[(rollup.index.get_level_values("Category") == "Other") & (rollup["expense_count"] > 0)]
+    if not other.empty:
+        src = (other["expense"].groupby(level="Name").sum() / 100).sort_values(ascending=False).head(3)
+        top_other_sources = [(k, float(v)) for k, v in src.items()]
 
     # Advice lines (journal-like)
     advice = []
@@ -275,51 +874,101 @@ def build_insights(df: pd.DataFrame):
         "moM": month_totals,
         "moM_changes": moM_changes,
         "category_spikes": category_spikes,
+        "monthly_matrix": matrix,
+        "category_changes": changes,
         "category_table": cat_table,
         "top_other_sources": top_other_sources,
         "advice_lines": advice
     }
 
 
-def fig_to_png_bytes(fig, dpi=140):
-    bio = BytesIO()
-    fig.savefig(bio, format="png", dpi=dpi, bbox_inches="tight", facecolor="white")
-    plt.close(fig)
-    bio.seek(0)
-    return bio
-
-
-def make_top_categories_chart(cat_table: pd.DataFrame):
-    if cat_table.empty:
-        return None
-    dfp = cat_table.head(5)
-    fig, ax = plt.subplots(figsize=(5.2, 3.2), facecolor="white")
+CHART_CACHE_SIZE = 32
+
+
+@st.cache_resource
+def _chart_cache():
+    # Process-wide PNG cache keyed by a hash of the plotted data and render options, plus one reusable
+    # Figure per chart kind; the lock guards both since report jobs render from worker threads
+    return {"entries": OrderedDict(), "templates": {}, "lock": threading.Lock(), "hits": 0, "misses": 0}
+
+
+def chart_key(kind, data, **options):
+    h = hashlib.sha1(kind.encode())
+    h.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    h.update(repr(sorted(options.items())).encode())
+    return h.hexdigest()
+
+
+def render_chart(kind, data, draw, figsize=(5.2, 3.2), dpi=140):
+    # Return PNG bytes for `data` drawn by draw(ax, data): cached renders are reused as-is, otherwise the
+    # kind's template Figure is cleared and redrawn instead of building a new pyplot figure every time
+    cache = _chart_cache()
+    key = chart_key(kind, data, figsize=figsize, dpi=dpi)
+    with cache["lock"]:
+        png = cache["entries"].get(key)
+        if png is not None:
+            cache["hits"] += 1
+            cache["entries"].move_to_end(key)
+            return BytesIO(png)
+        cache["misses"] += 1
+        fig = cache["templates"].get(kind)
+        if fig is None:
+            fig = cache["templates"][kind] = Figure(figsize=figsize, facecolor="white")
+            fig.add_subplot()
+        ax = fig.axes[0]
+        ax.clear()
+        draw(ax, data)
+        fig.tight_layout()
+        bio = BytesIO()
+        fig.savefig(bio, format="png", dpi=dpi, bbox_inches="tight", facecolor="white")
+        png = cache["entries"][key] = bio.getvalue()
+        while len(cache["entries"]) > CHART_CACHE_SIZE:
+            cache["entries"].popitem(last=False)
+    return BytesIO(png)
+
+
+def backend_get_chart_cache_stats():
+    cache = _chart_cache()
+    with cache["lock"]:
+        lookups = cache["hits"] + cache["misses"]
+        return {"size": len(cache["entries"]), "max_size": CHART_CACHE_SIZE, "hits": cache["hits"],
+                "misses": cache["misses"], "hit_rate": cache["hits"] / lookups if lookups else 0.0}
+
+
+def _draw_top_categories(ax, dfp):
     ax.barh(dfp["Category"][::-1], dfp["Amount"][::-1], color="#1f77b4")
     ax.set_xlabel("Amount (INR)")
     ax.set_title("Top Categories")
     ax.grid(axis="x", alpha=0.25)
     for i, v in enumerate(dfp["Amount"][::-1].values):
         ax.text(v, i, f"  {int(v):,}", va="center", fontsize=8)
-    fig.tight_layout()
-    return fig_to_png_bytes(fig)
 
 
-def make_monthly_expenses_chart(moM_series: pd.Series):
-    if moM_series is None or moM_series.empty:
-        return None
-    fig, ax = plt.subplots(figsize=(5.2, 3.2), facecolor="white")
+def _draw_monthly_expenses(ax, moM_series):
     ax.plot(moM_series.index, moM_series.values, marker="o", color="#ff7f0e")
     ax.set_title("Monthly Expenses")
     ax.set_xlabel("Month")
     ax.set_ylabel("Amount (INR)")
     ax.grid(alpha=0.25)
-    plt.xticks(rotation=30, ha="right")
-    fig.tight_layout()
-    return fig_to_png_bytes(fig)
+    for label in ax.get_xticklabels():
+        label.set_rotation(30)
+        label.set_ha("right")
+
 
+def make_top_categories_chart(cat_table: pd.DataFrame):
+    if cat_table.empty:
+        return None
+    return render_chart("top_categories", cat_table.head(5)[["Category", "Amount"]], _draw_top_categories)
 
-def generate_pdf_summary(df: pd.DataFrame) -> bytes:
-    insights = build_insights(df)
+
+def make_monthly_expenses_chart(moM_series: pd.Series):
+    if moM_series is None or moM_series.empty:
+        return None
+    return render_chart("monthly_expenses", moM_series, _draw_monthly_expenses)
+
+
+def generate_pdf_summary(df: pd.DataFrame, insights=None, rollup=None) -> bytes:
+    insights = insights if insights is not None else build_insights(df, rollup)
 
     buffer = BytesIO()
     c = canvas.Canvas(buffer, pagesize=A4)
@@ -438,6 +1087,124 @@ def generate_pdf_summary(df: pd.DataFrame) -> bytes:
     buffer.close()
     return pdf_bytes
 
+
+PDF_JOB_HISTORY = 8  # finished reports kept per session
+
+
+@st.cache_resource
+def _report_executor():
+    # Process-wide workers for PDF builds; charts render through render_chart, which is safe across threads
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="pdf-report")
+
+
+def backend_submit_pdf_job():
+    # Queue a PDF build of the current snapshot; a report for the same dataset version and day is reused
+    if st.session_state.df_global is None: raise ValueError("No data available")
+    jobs = st.session_state.pdf_jobs
+    version, day = st.session_state.dataset_version, datetime.now().strftime("%Y-%m-%d")
+    for job_id, job in jobs.items():
+        if job["version"] == version and job["day"] == day and not (job["future"].done() and job["future"].exception()):
+            jobs.move_to_end(job_id)
+            return job_id
+    job_id = uuid.uuid4().hex[:12]
+    future = _report_executor().submit(generate_pdf_summary, backend_get_transactions_df(), None, backend_get_rollup())
+    jobs[job_id] = {"future": future, "version": version, "day": day}
+    while len(jobs) > PDF_JOB_HISTORY:
+        jobs.popitem(last=False)
+    return job_id
+
+
+def backend_get_pdf_job(job_id):
+    job = st.session_state.pdf_jobs.get(job_id)
+    if job is None: raise ValueError(f"PDF job {job_id} not found.")
+    future = job["future"]
+    status = {"id": job_id, "version": job["version"], "status": "queued", "error": None, "pdf": None}
+    if future.running():
+        status["status"] = "running"
+    elif future.done():
+        if future.exception() is not None:
+            status.update(status="failed", error=str(future.exception()))
+        else:
+            status.update(status="done", pdf=future.result())
+    return status
+
+
+def build_dashboard_analytics(df: pd.DataFrame, rollup: pd.DataFrame):
+    # Everything the overview and detailed-analysis panels render that depends only on the data; totals and
+    # per-day/per-category series come from df's rollup (see build_rollup), row listings from df itself
+    out = {}
+    income, expenses = rollup['income'].sum(), rollup['expense'].sum()
+    out["metrics"] = {"total": int(rollup['count'].sum()), "categories_found": rollup.index.get_level_values('Category').nunique(),
+                      "net": float(income - expenses) / 100, "expenses": float(expenses) / 100, "income": float(income) / 100}
+
+    display_df = df.copy(deep=False)
+    display_df['Amount (₹)'] = display_df['Amount'].apply(lambda x: f"₹{x:,.2f}")
+    display_cols = ['Date', 'Description', 'Amount (₹)', 'Category']
+    out["transactions_table"] = display_df[[c for c in display_cols if c in display_df.columns]]
+
+    category_df = backend_get_expense_summary_df()
+    out["category_details"] = None
+    if not category_df.empty:
+        total_expense = category_df['Amount'].sum()
+        category_df['Percentage'] = (category_df['Amount'] / total_expense * 100).round(1) if total_expense > 0 else 0
+        out["fig_pie"] = px.pie(category_df, values='Amount', names='Category', title='Expense Distribution by Category')
+        out["fig_bar"] = px.bar(category_df, x='Category', y='Amount', title='Expense Amount by Category', color='Amount', color_continuous_scale='viridis')
+        out["fig_bar"].update_layout(xaxis_tickangle=-45)
+        category_df['Amount (₹)'] = category_df['Amount'].apply(lambda x: f"₹{x:,.2f}")
+        category_df['Percentage'] = category_df['Percentage'].apply(lambda x: f"{x:.1f}%")
+        out["category_details"] = category_df[['Category','Amount (₹)','Percentage','Transaction_Count']]
+
+    money_received_df = df[df["Deposit Amt."] > 0].copy()
+    money_received_df['Date'] = money_received_df['Date'].dt.strftime('%Y-%m-%d')
+    out["money_received"] = money_received_df[['Date', 'Name', 'Category', 'Deposit Amt.']]
+
+    merchants = backend_get_merchants(df)
+    merchants = merchants[(merchants['Name'] != 'N/A') & (merchants['Spend'] > 0)].nlargest(10, 'Spend')
+    merchants['Spend (₹)'] = merchants['Spend'].apply(lambda x: f"₹{x:,.2f}")
+    out["top_merchants"] = merchants[['Name', 'Spend (₹)', 'Transactions']]
+
+    # Total withdrawal amount and count per category
+    by_cat = rollup.groupby(level="Category")[["expense", "expense_count"]].sum()
+    by_cat = by_cat[by_cat["expense_count"] > 0]
+    cat_sum = (by_cat["expense"] / 100).sort_values(ascending=False)
+    cat_count = by_cat["expense_count"]
+
+    # Build complete table with all categories from df (including those with zero withdrawals)
+    all_cats = sorted(rollup.index.get_level_values("Category").unique().tolist())
+    cat_df = pd.DataFrame({"Category": all_cats}).merge(pd.DataFrame({"Category": cat_sum.index, "Withdrawal Amount": cat_sum.values}),
+        on="Category",how="left").merge(
+        pd.DataFrame({"Category": cat_count.index, "Transaction Count": cat_count.values}),on="Category",how="left")
+    cat_df["Withdrawal Amount"] = cat_df["Withdrawal Amount"].fillna(0.0).astype(float)
+    cat_df["Transaction Count"] = cat_df["Transaction Count"].fillna(0).astype(int)
+    cat_df = cat_df.sort_values("Withdrawal Amount", ascending=False)
+
+    show_df = cat_df.copy()
+    show_df["Withdrawal Amount (₹)"] = show_df["Withdrawal Amount"].apply(lambda x: f"₹{x:,.2f}")
+    out["category_totals"] = show_df[["Category", "Withdrawal Amount (₹)", "Transaction Count"]]
+    out["category_totals_plot"] = cat_df.set_index("Category")[["Withdrawal Amount"]]
+
+    # Daily series keyed by datetime.date, like a groupby on Date.dt.date
+    dining = rollup[rollup.index.get_level_values("Category") == "Dining"]
+    out["daily_dining"] = None
+    if not dining.empty:
+        daily = (dining["expense"] + dining["income"]).groupby(level="Date").sum() / 100
+        out["daily_dining"] = daily.set_axis(pd.Index(daily.index.date, name="Date"))
+
+    # Use only categories with positive totals for the pie chart
+    pie_df = cat_df[cat_df["Withdrawal Amount"] > 0].copy()
+    out["fig_pie_withdraw"] = None
+    if not pie_df.empty:
+        out["fig_pie_withdraw"] = px.pie(
+            pie_df,
+            names="Category",
+            values="Withdrawal Amount",
+            title="Category-wise Withdrawal Amount Distribution"
+        )
+
+    daily = rollup.loc[rollup["expense_count"] > 0, "expense"].groupby(level="Date").sum() / 100
+    out["daily_expenses"] = daily.set_axis(pd.Index(daily.index.date, name="Date"))
+    return out
+
 # ==============================================================================
 # FRONTEND UI
 # ==============================================================================
@@ -466,14 +1233,20 @@ tab1, tab2 = st.tabs(["📤 Upload Your CSV", "🔬 Use Sample Data"])
 
 
 with tab1:
-    uploaded_file = st.file_uploader("Choose a CSV file", type=['csv'], label_visibility="collapsed")
-    if uploaded_file is not None:
-        st.success(f"✅ File uploaded: {uploaded_file.name}")
+    uploaded_files = st.file_uploader("Choose CSV files", type=['csv'], accept_multiple_files=True, label_visibility="collapsed")
+    if uploaded_files:
+        st.success(f"✅ File uploaded: {', '.join(f.name for f in uploaded_files)}")
+        append = st.checkbox("Add to the current data instead of replacing it", disabled=st.session_state.df_global is None)
         if st.button("🚀 Launch Smart Analysis", type="primary"):
             with st.spinner("Processing your data..."):
                 try:
-                    backend_upload_csv(uploaded_file)
+                    if len(uploaded_files) == 1:
+                        res = backend_upload_csv(uploaded_files[0], append)
+                    else:
+                        res = backend_upload_csvs(uploaded_files, append)
                     st.success("✅ File processed successfully")
+                    if res["duplicates_dropped"]:
+                        st.toast(f"Skipped {res['duplicates_dropped']} duplicate transactions.")
                     st.session_state.data_updated = True
                     st.rerun()
                 except Exception as e:
@@ -496,52 +1269,55 @@ with tab2:
                 st.error(f"❌ Error processing sample file: {str(e)}")
 
 
+def pdf_download_panel(job_id, was_ready):
+    job = backend_get_pdf_job(job_id)
+    if job["status"] == "done":
+        if not was_ready: st.rerun()
+        st.download_button(
+            label="📄 Download PDF Summary",
+            data=job["pdf"],
+            file_name=f"expense_journal_{datetime.now().strftime('%Y%m%d')}.pdf",
+            mime="application/pdf",
+            type="primary",
+            help="Download a clean monthly spending journal with highlights and charts"
+        )
+    elif job["status"] == "failed":
+        if not was_ready: st.rerun()
+        st.error(f"Failed to generate PDF: {job['error']}")
+    else:
+        st.info("📄 Building your PDF summary in the background…")
+
+
 if st.session_state.data_updated or st.button("🔄 Refresh Data"):
     st.header("📊 Financial Overview")
     try:
         df = backend_get_transactions_df()
         if not df.empty:
-            df['Amount'] = pd.to_numeric(df['Amount'], errors='coerce')
-            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-            df.dropna(subset=['Date', 'Amount'], inplace=True)
-
-            categories_found = int(df['Category'].nunique(dropna=True))
+            analytics = cached_analytics("dashboard", lambda: build_dashboard_analytics(df, backend_get_rollup()))
+            metrics = analytics["metrics"]
             col1, col2, col3, col4, col5 = st.columns(5)
-            with col1: st.metric("Total Transactions", len(df))
-            with col2: st.metric("Categories Found", f"{ categories_found}")
-            with col3: st.metric("Net Amount", f"₹{df['Amount'].sum():,.2f}")
-            with col4: st.metric("Total Expenses", f"₹{abs(df[df['Amount'] < 0]['Amount'].sum()):,.2f}")
-            with col5: st.metric("Total Income", f"₹{df[df['Amount'] > 0]['Amount'].sum():,.2f}")
+            with col1: st.metric("Total Transactions", metrics["total"])
+            with col2: st.metric("Categories Found", f"{ metrics['categories_found']}")
+            with col3: st.metric("Net Amount", f"₹{metrics['net']:,.2f}")
+            with col4: st.metric("Total Expenses", f"₹{metrics['expenses']:,.2f}")
+            with col5: st.metric("Total Income", f"₹{metrics['income']:,.2f}")
             
 
             st.subheader("📋 All Transactions")
-            display_df = df.copy()
-            display_df['Amount (₹)'] = display_df['Amount'].apply(lambda x: f"₹{x:,.2f}")
-            display_cols = ['Date', 'Description', 'Amount (₹)', 'Category']
-            available_cols = [c for c in display_cols if c in display_df.columns]
-            st.dataframe(display_df[available_cols], use_container_width=True, hide_index=True)
+            st.dataframe(analytics["transactions_table"], use_container_width=True, hide_index=True)
 
 
             st.subheader("📈 Category Analysis")
             st.info("Expense distribution by category.")
-            category_df = backend_get_expense_summary_df()
-            if not category_df.empty:
-                total_expense = category_df['Amount'].sum()
-                category_df['Percentage'] = (category_df['Amount'] / total_expense * 100).round(1) if total_expense > 0 else 0
-
+            if analytics["category_details"] is not None:
                 c1, c2 = st.columns(2)
                 with c1:
-                    fig_pie = px.pie(category_df, values='Amount', names='Category', title='Expense Distribution by Category')
-                    st.plotly_chart(fig_pie, use_container_width=True)
+                    st.plotly_chart(analytics["fig_pie"], use_container_width=True)
                 with c2:
-                    fig_bar = px.bar(category_df, x='Category', y='Amount', title='Expense Amount by Category', color='Amount', color_continuous_scale='viridis')
-                    fig_bar.update_layout(xaxis_tickangle=-45)
-                    st.plotly_chart(fig_bar, use_container_width=True)
+                    st.plotly_chart(analytics["fig_bar"], use_container_width=True)
 
                 st.subheader("📋 Category Details")
-                category_df['Amount (₹)'] = category_df['Amount'].apply(lambda x: f"₹{x:,.2f}")
-                category_df['Percentage'] = category_df['Percentage'].apply(lambda x: f"{x:.1f}%")
-                st.dataframe(category_df[['Category','Amount (₹)','Percentage','Transaction_Count']], use_container_width=True, hide_index=True)
+                st.dataframe(analytics["category_details"], use_container_width=True, hide_index=True)
              
                 
             st.header("✏ Manual Categorization")
@@ -549,7 +1325,7 @@ if st.session_state.data_updated or st.button("🔄 Refresh Data"):
             if other_df.empty:
                 st.success("✅ All transactions categorized!")
             else:
-                st.write(f"📊 Found {len(other_df)} uncategorized transactions")
+                st.write(f"📊 Found {backend_get_other_count()} uncategorized transactions")
                 od = other_df.copy()
                 if 'Amount' in od.columns:
                     od['Amount (₹)'] = od['Amount'].apply(lambda x: f"₹{abs(x):,.2f}")
@@ -557,7 +1333,7 @@ if st.session_state.data_updated or st.button("🔄 Refresh Data"):
                 st.dataframe(od[[c for c in cols if c in od.columns]], use_container_width=True, hide_index=True)
 
 
-                cat_tab1, cat_tab2 = st.tabs(["🔄 Quick Categorization", "➕ Add Custom Category"])
+                cat_tab1, cat_tab2, cat_tab3 = st.tabs(["🔄 Quick Categorization", "➕ Add Custom Category", "🗂 Bulk Categorization"])
                 with cat_tab1:
                     with st.form("categorize_form"):
                         colA, colB = st.columns(2)
@@ -596,20 +1372,41 @@ if st.session_state.data_updated or st.button("🔄 Refresh Data"):
                                     st.rerun()
                                 except Exception as e:
                                     st.error(f"❌ Failed: {str(e)}")
+                with cat_tab3:
+                    with st.form("bulk_categorize_form"):
+                        bulk_df = other_df[['id', 'Description', 'Amount', 'Category']].astype({'Description': str, 'Category': str}).reset_index(drop=True)
+                        edited = st.data_editor(
+                            bulk_df, hide_index=True, use_container_width=True, disabled=['id', 'Description', 'Amount'],
+                            column_config={"Category": st.column_config.SelectboxColumn("Category", options=PREDEFINED_CATEGORIES)})
+                        if st.form_submit_button("🗂 Apply All Changes", type="primary"):
+                            changed = edited[edited['Category'] != bulk_df['Category']]
+                            if changed.empty:
+                                st.info("No changes to apply.")
+                            else:
+                                try:
+                                    res = backend_update_categories(
+                                        {"id": int(r.id), "category": r.Category} for r in changed.itertuples(index=False))
+                                    st.success(f"✅ {res['message']}.")
+                                    st.rerun()
+                                except Exception as e:
+                                    st.error(f"❌ Failed: {str(e)}")
 
 
             st.title("🔎 Choose the Category or Name")
             st.info("Filter to specific transactions.")
             if 'Category' in df.columns:
+                first_day, last_day = df.index[0].date(), df.index[-1].date()
+                selected_dates = st.date_input("Select Date Range", value=(first_day, last_day), min_value=first_day, max_value=last_day)
                 selected_category = st.selectbox("Select Category", ['All'] + sorted(df['Category'].unique()))
                 selected_name = st.selectbox("Select Name", ['All'] + sorted(df['Description'].unique()))
-                filtered_df = df.copy()
+                # a half-picked range (start only) runs to the last day
+                filtered_df = date_range(df, *selected_dates) if isinstance(selected_dates, tuple) else date_range(df, selected_dates, selected_dates)
                 if selected_category != 'All':
                     filtered_df = filtered_df[filtered_df['Category'] == selected_category]
                 if selected_name != 'All':
                     filtered_df = filtered_df[filtered_df['Description'] == selected_name]
                 st.write("Filtered Data:")
-                df_disp = filtered_df.copy()
+                df_disp = filtered_df.copy(deep=False)
                 df_disp['Amount (₹)'] = df_disp['Amount'].apply(lambda x: f"₹{x:,.2f}")
                 desired_cols = ['id', 'custom_name', 'Date', 'Category', 'Description', 'Amount (₹)']
                 st.dataframe(df_disp[[c for c in desired_cols if c in df_disp.columns]], use_container_width=True, hide_index=True)
@@ -619,95 +1416,54 @@ if st.session_state.data_updated or st.button("🔄 Refresh Data"):
             st.header("✨ Detailed Financial Analysis")
             st.info("Deeper insights into spending patterns.")
 
-            # Build expenses_df for downstream charts
-            expenses_df = df[df['Amount'] < 0].copy()
-            expenses_df['Amount'] = expenses_df['Amount'].abs()
-
             st.title("Money Received")
-            money_received_df = df[df["Deposit Amt."] > 0].copy()
-            money_received_df['Date'] = pd.to_datetime(money_received_df['Date']).dt.strftime('%Y-%m-%d')
-
             st.dataframe(
-                money_received_df[['Date', 'Name', 'Category', 'Deposit Amt.']],
+                analytics["money_received"],
                 use_container_width=True,
                 hide_index=True)
+
+            st.title("🏪 Top Merchants")
+            st.dataframe(analytics["top_merchants"], use_container_width=True, hide_index=True)
             
             st.title('Category-wise Withdrawal Amount Sum:')
             st.info("Bar plot of total withdrawals per category, with a table of categories and totals.")
 
-            # Group by Category to get total withdrawal amount and counts
-            cat_sum = (expenses_df.groupby("Category", dropna=False)["Amount"].sum().sort_values(ascending=False))
-            cat_count = expenses_df.groupby("Category", dropna=False)["Amount"].count()
-
-            # Build complete table with all categories from df (including those with zero withdrawals)
-            all_cats = sorted(df['Category'].dropna().unique().tolist())
-            cat_df = pd.DataFrame({"Category": all_cats}).merge(pd.DataFrame({"Category": cat_sum.index, "Withdrawal Amount": cat_sum.values}),
-                on="Category",how="left").merge(
-                pd.DataFrame({"Category": cat_count.index, "Transaction Count": cat_count.values}),on="Category",how="left")
-            cat_df["Withdrawal Amount"] = cat_df["Withdrawal Amount"].fillna(0.0).astype(float)
-            cat_df["Transaction Count"] = cat_df["Transaction Count"].fillna(0).astype(int)
-            cat_df = cat_df.sort_values("Withdrawal Amount", ascending=False)
-
             # Table
-            show_df = cat_df.copy()
-            show_df["Withdrawal Amount (₹)"] = show_df["Withdrawal Amount"].apply(lambda x: f"₹{x:,.2f}")
-            show_df = show_df[["Category", "Withdrawal Amount (₹)", "Transaction Count"]]
             st.subheader("Categories and Totals")
-            st.dataframe(show_df, use_container_width=True, hide_index=True)
+            st.dataframe(analytics["category_totals"], use_container_width=True, hide_index=True)
             
             # Bar chart
-            plot_df = cat_df.set_index("Category")[["Withdrawal Amount"]]
+            plot_df = analytics["category_totals_plot"]
             if plot_df.empty:
                 st.info("No expense categories to display.")
             else:
                 st.bar_chart(plot_df, use_container_width=True)
 
             st.title('🍔 Daily Spending on Dining')
-            dining_df = df[df["Category"] == "Dining"].copy()
-            if not dining_df.empty:
-                dining_df['Amount'] = dining_df['Amount'].abs()
-                daily_spending_food = dining_df.groupby(dining_df['Date'].dt.date)['Amount'].sum()
-                st.write(daily_spending_food)
-                st.line_chart(daily_spending_food)
+            if analytics["daily_dining"] is not None:
+                st.write(analytics["daily_dining"])
+                st.line_chart(analytics["daily_dining"])
             else:
                 st.info("No spending recorded in 'Dining' category.")
             
             st.title('Category-wise Withdrawal Amount Distribution')
             st.info("Percentage share of total withdrawals per category.")
 
-            # Use only categories with positive totals for the pie chart
-            pie_df = cat_df[cat_df["Withdrawal Amount"] > 0].copy()
-            if pie_df.empty:
+            if analytics["fig_pie_withdraw"] is None:
                 st.info("No positive withdrawal totals to display.")
             else:
-                fig_pie_withdraw = px.pie(
-                    pie_df,
-                    names="Category",
-                    values="Withdrawal Amount",
-                    title="Category-wise Withdrawal Amount Distribution"
-                )
-                st.plotly_chart(fig_pie_withdraw, use_container_width=True)
+                st.plotly_chart(analytics["fig_pie_withdraw"], use_container_width=True)
 
            
             st.title("📉 Daily Expense Overview")
-            daily_expenses = expenses_df.groupby(expenses_df['Date'].dt.date)['Amount'].sum()
-            st.write(daily_expenses)
-            st.line_chart(daily_expenses)
+            st.write(analytics["daily_expenses"])
+            st.line_chart(analytics["daily_expenses"])
             
             if 'df_global' in st.session_state and st.session_state.df_global is not None:
-                df_for_pdf = st.session_state.df_global.copy()
-                try:
-                    pdf_bytes = generate_pdf_summary(df_for_pdf)
-                    st.download_button(
-                        label="📄 Download PDF Summary",
-                        data=pdf_bytes,
-                        file_name=f"expense_journal_{datetime.now().strftime('%Y%m%d')}.pdf",
-                        mime="application/pdf",
-                        type="primary",
-                        help="Download a clean monthly spending journal with highlights and charts"
-                    )
-                except Exception as e:
-                    st.error(f"Failed to generate PDF: {e}")
+                pdf_job_id = backend_submit_pdf_job()
+                pdf_ready = backend_get_pdf_job(pdf_job_id)["status"] in ("done", "failed")
+                # Poll only while the report is building; once it finishes the whole page reruns to stop polling
+                st.fragment(run_every=None if pdf_ready else 1)(pdf_download_panel)(pdf_job_id, pdf_ready)
                         
             
             TIPS = [
@@ -879,6 +1635,27 @@ st.sidebar.markdown("""
 4. Use Manual Categorization for uncategorized transactions
 5. Explore the detailed analysis and graphs
 """)
+cache_stats = backend_get_cache_stats()
+st.sidebar.caption(
+    f"Categorization cache: {cache_stats['hits']:,} hits / {cache_stats['misses']:,} misses "
+    f"({cache_stats['hit_rate']:.0%} hit rate, {cache_stats['size']:,} narrations)"
+)
+analytics_stats = backend_get_analytics_cache_stats()
+st.sidebar.caption(
+    f"Analytics cache: {analytics_stats['hits']:,} hits / {analytics_stats['misses']:,} misses "
+    f"({analytics_stats['hit_rate']:.0%} hit rate, {analytics_stats['size']}/{analytics_stats['max_size']} results)"
+)
+chart_stats = backend_get_chart_cache_stats()
+st.sidebar.caption(
+    f"Chart cache: {chart_stats['hits']:,} hits / {chart_stats['misses']:,} misses "
+    f"({chart_stats['hit_rate']:.0%} hit rate, {chart_stats['size']}/{chart_stats['max_size']} images)"
+)
+memory = cached_analytics("memory", backend_get_memory_report)
+if memory:
+    st.sidebar.caption(
+        f"Dataset memory: {memory['bytes'] / 2**20:,.1f} MiB for {memory['rows']:,} rows "
+        f"({memory['reduction']:.0%} smaller than the expanded layout)"
+    )
 st.sidebar.header("🔧 CSV Format Support")
 st.sidebar.info("""
 Format 1: Standard — Date, Description, Amount
@@ -0,0 +1,55 @@
+import io
+
+import pandas as pd
+
+import app_backup
+
+WHOLE_RUPEE_AMOUNTS = (
+    "Date,Description,Amount\n"
+    "01-09-2023,UPI-SWIGGY-swiggy@OKICICI,-100\n"
+    "02-09-2023,UPI-SALARY CREDIT,5000\n"
+)
+
+
+def transactions(ids):
+    return pd.DataFrame({
+        'Date': pd.to_datetime(['2023-09-01'] * len(ids)),
+        'Description': ['UPI-SWIGGY-swiggy@OKICICI'] * len(ids),
+        'Amount': pd.array([-25000] * len(ids), dtype='Int64'),
+        'Category': ['Dining'] * len(ids),
+        'id': ids,
+    })
+
+
+def test_expanded_frame_is_compacted_again():
+    compact = app_backup.compact_transactions(transactions([1, 2]))
+    expanded = app_backup.expand_transactions(compact)
+    assert 'compact' not in expanded.attrs
+    assert expanded['Amount'].tolist() == [-250.0, -250.0]
+    recompacted = app_backup.compact_transactions(expanded)
+    assert recompacted['Amount'].tolist() == [-25000, -25000]
+    assert recompacted['id'].dtype == 'int32'
+    assert isinstance(recompacted['Category'].dtype, pd.CategoricalDtype)
+
+
+def test_ids_beyond_int32_are_not_downcast():
+    compact = app_backup.compact_transactions(transactions([1, 2 ** 31]))
+    assert compact['id'].tolist() == [1, 2 ** 31]
+
+
+def upload(client, text, query=''):
+    response = client.post('/api/upload_csv' + query, data={'file': (io.BytesIO(text.encode()), 'statement.csv')})
+    assert response.status_code == 200, response.get_json()
+
+
+def test_whole_rupee_amounts_are_converted_to_paise(client):
+    upload(client, WHOLE_RUPEE_AMOUNTS)
+    assert [row['Amount'] for row in client.get('/api/get_transactions').get_json()] == [-100.0, 5000.0]
+    assert client.get('/api/get_expense_summary').get_json() == [
+        {'Category': 'Dining', 'Amount': 100.0, 'Transaction_Count': 1}]
+
+
+def test_whole_rupee_amounts_are_converted_to_paise_when_streamed(client):
+    upload(client, WHOLE_RUPEE_AMOUNTS, '?mode=stream&chunk_size=1')
+    assert [row['Amount'] for row in client.get('/api/get_transactions').get_json()] == [-100.0, 5000.0]
+    assert client.get('/api/get_expense_summary').get_json()[0]['Amount'] == 100.0
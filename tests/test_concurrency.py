@@ -0,0 +1,40 @@
+import io
+import threading
+
+import app_backup
+
+CATEGORIES = ['Dining', 'Groceries', 'Shopping', 'Travel']
+
+
+def statement(rows):
+    lines = ["Date,Description,Amount"]
+    lines += [f"{1 + i % 28:02d}-09-2023,UPI-PAYEE{i}-payee{i}@OKICICI,-{100 + i}.50" for i in range(rows)]
+    return "\n".join(lines) + "\n"
+
+
+def test_concurrent_edits_keep_aggregates_in_step_with_the_data(client):
+    response = client.post('/api/upload_csv', data={'file': (io.BytesIO(statement(40).encode()), 'statement.csv')})
+    assert response.status_code == 200
+    
+    failures = []
+    
+    def edit(worker):
+        for i in range(30):
+            transaction_id = 1 + (worker * 7 + i) % 40
+            response = client.post('/api/update_category', json={
+                'id': transaction_id, 'category': CATEGORIES[(worker + i) % len(CATEGORIES)]})
+            if response.status_code != 200:
+                failures.append(response.get_json())
+    
+    threads = [threading.Thread(target=edit, args=(worker,)) for worker in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert failures == []
+    
+    df = app_backup.load_dataset('default')
+    assert app_backup.dataset_aggregates('default', df) == app_backup.category_aggregates(df)
+    app_backup._datasets.clear()
+    reloaded = app_backup.load_dataset('default')
+    assert reloaded['Category'].astype(str).tolist() == df['Category'].astype(str).tolist()
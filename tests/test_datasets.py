@@ -0,0 +1,21 @@
+import io
+
+STATEMENT = (
+    "Date,Description,Amount\n"
+    "01-09-2023,UPI-SWIGGY-swiggy@OKICICI,-250.00\n"
+    "02-09-2023,UPI-SALARY CREDIT,50000.00\n"
+)
+
+
+def test_dataset_listing_reports_totals_without_ids(client):
+    for dataset_id in ('tenant-a', 'tenant-b'):
+        response = client.post('/api/upload_csv', headers={'X-Dataset-Id': dataset_id},
+                               data={'file': (io.BytesIO(STATEMENT.encode()), 'statement.csv')})
+        assert response.status_code == 200
+    
+    response = client.get('/api/datasets')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['resident_datasets'] == 2
+    assert body['resident_rows'] == 4
+    assert 'tenant-a' not in response.get_data(as_text=True)
@@ -0,0 +1,37 @@
+import io
+
+STATEMENT = (
+    "Date,Description,Amount\n"
+    "28-09-2023,UPI-SWIGGY-swiggy@OKICICI,-250.00\n"
+    "01-10-2023,UPI-ZOMATO-zomato@OKSBI,-300.00\n"
+    "05-10-2023,UPI-SALARY CREDIT,50000.00\n"
+    ",UPI-UNDATED,-10.00\n"
+)
+
+
+def upload(client):
+    response = client.post('/api/upload_csv', data={'file': (io.BytesIO(STATEMENT.encode()), 'statement.csv')})
+    assert response.status_code == 200, response.get_json()
+
+
+def listed_descriptions(client, query):
+    response = client.get('/api/get_transactions' + query)
+    assert response.status_code == 200, response.get_json()
+    return [row['Description'] for row in response.get_json()]
+
+
+def test_from_without_to_runs_to_the_last_dated_row(client):
+    upload(client)
+    assert listed_descriptions(client, '?from=2023-10-01') == ['UPI-ZOMATO-zomato@OKSBI', 'UPI-SALARY CREDIT']
+
+
+def test_to_without_from_starts_at_the_first_row(client):
+    upload(client)
+    assert listed_descriptions(client, '?to=2023-10-01') == ['UPI-SWIGGY-swiggy@OKICICI', 'UPI-ZOMATO-zomato@OKSBI']
+
+
+def test_expense_summary_accepts_from_alone(client):
+    upload(client)
+    response = client.get('/api/get_expense_summary?from=2023-10-01')
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json() == [{'Category': 'Dining', 'Amount': 300.0, 'Transaction_Count': 1}]
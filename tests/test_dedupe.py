@@ -0,0 +1,49 @@
+import io
+
+TWO_EQUAL_PAYMENTS = (
+    "Date,Description,Amount\n"
+    "01-09-2023,UPI-SWIGGY-swiggy@OKICICI,-250.00\n"
+    "01-09-2023,UPI-SWIGGY-swiggy@OKICICI,-250.00\n"
+    "02-09-2023,UPI-SALARY CREDIT,50000.00\n"
+)
+
+REPEATED_BANK_ROW = (
+    "Date,Narration,Value Dt,Withdrawal Amt.,Deposit Amt.,Closing Balance\n"
+    "01-09-2023,UPI-SWIGGY-swiggy@OKICICI,01-09-2023,250.00,,9750.00\n"
+    "01-09-2023,UPI-SWIGGY-swiggy@OKICICI,01-09-2023,250.00,,9750.00\n"
+    "01-09-2023,UPI-SWIGGY-swiggy@OKICICI,01-09-2023,250.00,,9500.00\n"
+)
+
+
+def upload(client, *contents, append=False):
+    files = [(io.BytesIO(text.encode()), f'statement{i}.csv') for i, text in enumerate(contents)]
+    response = client.post('/api/upload_csv' + ('?append=true' if append else ''), data={'file': files})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_identical_rows_in_amount_format_both_survive(client):
+    body = upload(client, TWO_EQUAL_PAYMENTS)
+    assert body['total_transactions'] == 3
+    assert body['duplicates_dropped'] == 0
+
+
+def test_repeated_row_with_closing_balance_is_dropped(client):
+    body = upload(client, REPEATED_BANK_ROW)
+    assert body['total_transactions'] == 2
+    assert body['duplicates_dropped'] == 1
+
+
+def test_overlapping_files_drop_only_copies_already_seen(client):
+    body = upload(client, TWO_EQUAL_PAYMENTS, TWO_EQUAL_PAYMENTS)
+    assert body['total_transactions'] == 3
+    assert body['duplicates_dropped'] == 3
+
+
+def test_append_keeps_payments_beyond_the_known_copies(client):
+    upload(client, TWO_EQUAL_PAYMENTS)
+    three_payments = TWO_EQUAL_PAYMENTS + "01-09-2023,UPI-SWIGGY-swiggy@OKICICI,-250.00\n"
+    body = upload(client, three_payments, append=True)
+    assert body['appended'] == 1
+    assert body['duplicates_dropped'] == 3
+    assert body['total_transactions'] == 4
@@ -0,0 +1,51 @@
+import io
+import os
+
+import app_backup
+
+STATEMENT = (
+    "Date,Description,Amount\n"
+    "01-09-2023,UPI-SWIGGY-swiggy@OKICICI,-250.00\n"
+    "02-09-2023,UPI-UBER-uber@OKAXIS,-180.00\n"
+    "03-09-2023,UPI-SALARY CREDIT,50000.00\n"
+)
+
+
+def upload(client):
+    response = client.post('/api/upload_csv', data={'file': (io.BytesIO(STATEMENT.encode()), 'statement.csv')})
+    assert response.status_code == 200, response.get_json()
+
+
+def categories_on_disk():
+    app_backup._datasets.clear()
+    df = app_backup.load_dataset('default')
+    return dict(zip(df['id'].tolist(), df['Category'].astype(str)))
+
+
+def test_single_edits_are_logged_not_rewritten(client):
+    upload(client)
+    mtime = os.stat(app_backup.dataset_path('default')).st_mtime_ns
+    
+    assert client.post('/api/update_category', json={'id': 2, 'category': 'Travel'}).status_code == 200
+    assert client.post('/api/add_custom_category', json={'id': 1, 'custom_category': 'Treats'}).status_code == 200
+    
+    assert os.stat(app_backup.dataset_path('default')).st_mtime_ns == mtime
+    assert categories_on_disk() == {1: 'Treats', 2: 'Travel', 3: 'Other'}
+
+
+def test_edits_after_a_reload_from_disk(client):
+    upload(client)
+    app_backup._datasets.clear()
+    assert client.post('/api/update_category', json={'id': 3, 'category': 'Investment'}).status_code == 200
+    assert categories_on_disk()[3] == 'Investment'
+
+
+def test_full_edit_log_is_folded_into_the_dataset_file(client, monkeypatch):
+    monkeypatch.setattr(app_backup, 'EDIT_LOG_MAX_ENTRIES', 2)
+    upload(client)
+    assert client.post('/api/update_category', json={'id': 1, 'category': 'Groceries'}).status_code == 200
+    assert os.path.exists(app_backup.edits_path('default'))
+    assert client.post('/api/update_categories', json=[{'id': 2, 'category': 'Shopping'}]).status_code == 200
+    
+    assert not os.path.exists(app_backup.edits_path('default'))
+    assert categories_on_disk() == {1: 'Groceries', 2: 'Shopping', 3: 'Other'}
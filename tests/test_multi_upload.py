@@ -0,0 +1,32 @@
+import io
+
+SEPTEMBER = (
+    "Date,Description,Amount\n"
+    "01-09-2023,UPI-SWIGGY-swiggy@OKICICI-MULTI,-250.00\n"
+    "02-09-2023,UPI-UBER-uber@OKAXIS-MULTI,-180.00\n"
+)
+OCTOBER = (
+    "Date,Description,Amount\n"
+    "01-10-2023,UPI-SWIGGY-swiggy@OKICICI-MULTI,-320.00\n"
+    "02-10-2023,UPI-NETFLIX-netflix@OKSBI-MULTI,-649.00\n"
+)
+
+
+def cache_counters(client):
+    stats = client.get('/api/categorization_cache').get_json()
+    return stats['hits'], stats['misses']
+
+
+def test_multi_file_upload_categorizes_through_the_shared_cache(client):
+    hits, misses = cache_counters(client)
+    files = [(io.BytesIO(SEPTEMBER.encode()), 'sep.csv'), (io.BytesIO(OCTOBER.encode()), 'oct.csv')]
+    response = client.post('/api/upload_csv', data={'file': files})
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['categories'] == {'Dining': 2, 'Transportation': 1, 'Entertainment': 1}
+    # Three distinct narrations across the two files, the shared one looked up once
+    assert cache_counters(client) == (hits, misses + 3)
+    
+    files = [(io.BytesIO(SEPTEMBER.encode()), 'sep.csv'), (io.BytesIO(OCTOBER.encode()), 'oct.csv')]
+    response = client.post('/api/upload_csv', data={'file': files})
+    assert response.status_code == 200, response.get_json()
+    assert cache_counters(client) == (hits + 3, misses + 3)